@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Build the IQ Game MongoDB indexes and verify every route query uses them.
+
+Duplicate daily challenges, which would block the unique date index, are
+merged first (the earliest one per date is kept).
+
+Exits non-zero if an index could not be created or any query plan contains
+a COLLSCAN or an in-memory SORT stage. Aggregations that read every candidate
+on purpose (whole-pool samples and counts) are listed as full scans and may
+COLLSCAN.
+
+Usage:
+    python check_indexes.py
+"""
+
+import asyncio
+import sys
+
+from server import client, ensure_indexes, verify_query_plans
+
+
+async def run() -> int:
+    failures = await ensure_indexes()
+    for failure in failures:
+        print(f"❌ Index: {failure}")
+
+    report = await verify_query_plans()
+    for query in report['queries']:
+        status = "❌" if query['problems'] else "✅"
+        note = " (full scan by design)" if query['full_scan'] else ""
+        print(f"{status} {query['name']}: {' <- '.join(query['stages'])}{note}")
+
+    return 0 if report['ok'] and not failures else 1
+
+
+def main() -> int:
+    try:
+        return asyncio.run(run())
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
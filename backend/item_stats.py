@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Estimate per-question difficulty and discrimination for adaptive mode.
+
+Reads the per-question responses stored with verified scores and fits an
+approximate two-parameter logistic (2PL) model per question from classical
+statistics: the proportion correct gives the difficulty and the correlation
+with the rest of the game gives the discrimination. Estimates from few
+responses are shrunk towards the question's difficulty label. Results are
+upserted into the item_stats collection, which the server reloads on its
+own.
+
+Usage:
+    python item_stats.py
+    python item_stats.py --min-responses 50 --dry-run
+"""
+
+import argparse
+import asyncio
+import math
+import sys
+from datetime import datetime
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+from pymongo import UpdateOne
+
+from server import ItemParameters, client, db
+
+NORMAL = NormalDist()
+# Logistic-to-normal-ogive scaling constant
+D = 1.702
+
+
+class ItemCounts:
+    __slots__ = ('correct', 'rest')
+
+    def __init__(self):
+        self.correct: List[int] = []
+        self.rest: List[float] = []
+
+
+async def collect(limit: int) -> Dict[str, ItemCounts]:
+    items: Dict[str, ItemCounts] = {}
+    cursor = db.scores.find(
+        {'verified': True, 'responses': {'$exists': True}},
+        {'_id': 0, 'responses': 1}
+    ).sort('created_at', -1).limit(limit)
+    async for score in cursor:
+        ids = score['responses']['question_ids']
+        answered = [(qid, bool(c)) for qid, c in zip(ids, score['responses']['correct']) if c is not None]
+        if len(answered) < 2:
+            continue
+        # Rest score: proportion correct on the other questions of the same game
+        total = sum(c for _, c in answered)
+        for qid, correct in answered:
+            counts = items.setdefault(qid, ItemCounts())
+            counts.correct.append(int(correct))
+            counts.rest.append((total - correct) / (len(answered) - 1))
+    return items
+
+
+async def label_difficulties(ids: List[str]) -> Dict[str, str]:
+    labels = {}
+    async for q in db.questions.find({'id': {'$in': ids}}, {'_id': 0, 'id': 1, 'difficulty': 1}):
+        labels[q['id']] = q.get('difficulty', 'medium')
+    return labels
+
+
+def estimate(counts: ItemCounts, prior_b: float, prior_weight: float) -> Dict:
+    correct = np.asarray(counts.correct, dtype=float)
+    rest = np.asarray(counts.rest, dtype=float)
+    n = len(correct)
+    # Keep p away from 0/1 so the probit stays finite
+    p = float((correct.sum() + 0.5) / (n + 1))
+
+    r = 0.0
+    if correct.std() > 0 and rest.std() > 0:
+        point_biserial = float(np.corrcoef(correct, rest)[0, 1])
+        # Point-biserial to biserial: divide by the normal density at the split
+        height = math.exp(-0.5 * NORMAL.inv_cdf(p) ** 2) / math.sqrt(2 * math.pi)
+        r = point_biserial * math.sqrt(p * (1 - p)) / height
+    r = min(max(r, 0.05), 0.9)
+
+    a = D * r / math.sqrt(1 - r * r)
+    b = -NORMAL.inv_cdf(p) / r
+    # Shrink towards the label prior (a = 1) with the weight of `prior_weight` responses
+    w = n / (n + prior_weight)
+    return {
+        'n': n,
+        'p_correct': round(p, 4),
+        'r_biserial': round(r, 4),
+        'a': round(w * min(a, 3.0) + (1 - w), 4),
+        'b': round(w * min(max(b, -4.0), 4.0) + (1 - w) * prior_b, 4),
+    }
+
+
+async def run(args) -> int:
+    items = await collect(args.limit)
+    items = {qid: c for qid, c in items.items() if len(c.correct) >= args.min_responses}
+    if not items:
+        print("No questions with enough responses")
+        return 0
+
+    labels = await label_difficulties(list(items))
+    now = datetime.utcnow()
+    operations = []
+    for qid, counts in items.items():
+        prior_b = ItemParameters.PRIOR_B.get(labels.get(qid, 'medium'), 0.0)
+        stats = estimate(counts, prior_b, args.prior_weight)
+        if args.verbose:
+            print(f"{qid}: n={stats['n']} p={stats['p_correct']} a={stats['a']} b={stats['b']}")
+        operations.append(UpdateOne({'id': qid}, {'$set': {**stats, 'id': qid, 'updated_at': now}}, upsert=True))
+
+    if args.dry_run:
+        print(f"Estimated {len(operations)} questions (dry run, nothing written)")
+        return 0
+    await db.item_stats.bulk_write(operations, ordered=False)
+    print(f"✅ Updated statistics for {len(operations)} questions")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Estimate IQ Game item statistics for adaptive mode")
+    parser.add_argument('--limit', type=int, default=100000, help="most recent verified scores to read")
+    parser.add_argument('--min-responses', type=int, default=20, help="skip questions answered fewer times")
+    parser.add_argument('--prior-weight', type=float, default=50.0, help="responses' worth of the label prior")
+    parser.add_argument('--dry-run', action='store_true', help="print a summary without writing")
+    parser.add_argument('--verbose', action='store_true', help="print every estimate")
+    args = parser.parse_args(argv)
+    try:
+        return asyncio.run(run(args))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Simulate many concurrent multiplayer rooms.
+
+By default the bots run in-process against a private RoomManager fed with
+the sample questions, so neither MongoDB nor a running server is needed and
+the numbers show what one worker's room runtime can sustain. With --url the
+same bots connect over real WebSockets to a running server instead.
+
+Usage:
+    python multiplayer_load_test.py --rooms 2000
+    python multiplayer_load_test.py --rooms 50 --url ws://localhost:8001/api/ws/multiplayer
+"""
+
+import abc
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+from typing import Dict, List, Optional
+
+from server import (
+    DIFFICULTIES,
+    LANGUAGES,
+    MP_OUTBOX_SIZE,
+    PlayerConnection,
+    RoomManager,
+    format_question,
+    load_sample_questions,
+)
+
+
+class Bot(abc.ABC):
+    """Joins a queue, answers each question after a random think time."""
+
+    def __init__(self, language: str, difficulty: str, think: float):
+        self.language = language
+        self.difficulty = difficulty
+        self.think = think
+        self.messages = 0
+        self.rounds = 0
+        self.completed = False
+        self.round_seconds: List[float] = []
+        self.question_at = 0.0
+        self.finished = asyncio.Event()
+
+    @abc.abstractmethod
+    async def send(self, message: Dict):
+        ...
+
+    async def on_frame(self, frame: str):
+        self.messages += 1
+        message = json.loads(frame)
+        kind = message['type']
+        if kind == 'start':
+            self.rounds = message['rounds']
+        elif kind == 'question':
+            self.question_at = time.perf_counter()
+            options = len(message['question']['options'])
+            asyncio.create_task(self.answer(message['round'], random.randrange(options)))
+        elif kind == 'round_result':
+            self.round_seconds.append(time.perf_counter() - self.question_at)
+        elif kind == 'game_over':
+            self.completed = True
+            self.finished.set()
+        elif kind == 'error':
+            self.finished.set()
+
+    async def answer(self, round_index: int, choice: int):
+        await asyncio.sleep(random.uniform(0, self.think))
+        await self.send({'type': 'answer', 'round': round_index, 'answer': choice})
+
+    def join_message(self, index: int) -> Dict:
+        return {'type': 'join', 'language': self.language, 'difficulty': self.difficulty, 'name': f"bot-{index}"}
+
+
+class LocalBot(Bot):
+    def __init__(self, manager: RoomManager, *args):
+        super().__init__(*args)
+        self.manager = manager
+        self.player = PlayerConnection(self.on_frame, self.on_close, MP_OUTBOX_SIZE)
+
+    async def send(self, message: Dict):
+        await self.manager.handle(self.player, message)
+
+    async def on_close(self, code: int):
+        self.finished.set()
+
+    async def play(self, index: int):
+        await self.send(self.join_message(index))
+        await self.finished.wait()
+        self.player.close()
+
+
+class SocketBot(Bot):
+    def __init__(self, url: str, *args):
+        super().__init__(*args)
+        self.url = url
+        self.socket = None
+
+    async def send(self, message: Dict):
+        await self.socket.send(json.dumps(message))
+
+    async def play(self, index: int):
+        import websockets
+
+        async with websockets.connect(self.url) as socket:
+            self.socket = socket
+            await self.send(self.join_message(index))
+            async for frame in socket:
+                await self.on_frame(frame)
+                if self.finished.is_set():
+                    break
+
+
+def sample_question_source():
+    # Seed questions get their ids when stored, so use the content hash instead
+    questions = [{**q, 'id': q['content_hash'][:12]} for q in load_sample_questions()]
+
+    async def source(language: str, difficulty: str, count: int) -> List[Dict]:
+        pool = [q for q in questions if q['difficulty'] == difficulty] or list(questions)
+        return [format_question(q, language) for q in random.sample(pool, min(count, len(pool)))]
+
+    return source
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def run(args) -> int:
+    manager: Optional[RoomManager] = None
+    if not args.url:
+        manager = RoomManager(
+            sample_question_source(), args.room_size, args.room_size, 0,
+            args.questions, args.round_seconds, 0
+        )
+
+    bots: List[Bot] = []
+    for i in range(args.rooms * args.room_size):
+        # Consecutive bots share a queue so every room fills up
+        room = i // args.room_size
+        key = (LANGUAGES[room % len(LANGUAGES)], DIFFICULTIES[room % len(DIFFICULTIES)], args.think)
+        bots.append(LocalBot(manager, *key) if manager else SocketBot(args.url, *key))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bot.play(i) for i, bot in enumerate(bots)))
+    elapsed = time.perf_counter() - started
+
+    rounds = [s for bot in bots for s in bot.round_seconds]
+    messages = sum(bot.messages for bot in bots)
+    # ru_maxrss is in KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"Rooms:         {args.rooms} x {args.room_size} players, {args.questions} questions")
+    print(f"Elapsed:       {elapsed:.2f}s")
+    print(f"Messages:      {messages} ({messages / elapsed:,.0f}/s)")
+    print(f"Round time:    p50 {percentile(rounds, 0.5) * 1000:.0f} ms, p95 {percentile(rounds, 0.95) * 1000:.0f} ms")
+    print(f"Peak RSS:      {peak_mb:.1f} MB")
+    if manager:
+        print(f"Room manager:  {manager.metrics()}")
+
+    incomplete = sum(1 for bot in bots if not bot.completed or len(bot.round_seconds) < bot.rounds)
+    if incomplete:
+        print(f"❌ {incomplete} bots did not finish every round")
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent IQ Game multiplayer rooms")
+    parser.add_argument('--rooms', type=int, default=1000, help="number of rooms to fill")
+    parser.add_argument('--room-size', type=int, default=2, help="players per room")
+    parser.add_argument('--questions', type=int, default=5, help="questions per room (in-process only)")
+    parser.add_argument('--round-seconds', type=float, default=2.0, help="round deadline (in-process only)")
+    parser.add_argument('--think', type=float, default=0.5, help="maximum bot think time in seconds")
+    parser.add_argument('--url', help="WebSocket URL of a running server; omit to run in-process")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Question pack import/export for the IQ Game question bank.
+
+Streams the `questions` collection to or from NDJSON files (gzip-compressed
+when the path ends in .gz). Imports write a checkpoint after every batch and
+upsert on question id, so an interrupted import can be re-run and resumes
+where it stopped without creating duplicates.
+
+Usage:
+    python question_pack.py export questions.ndjson.gz
+    python question_pack.py import questions.ndjson.gz --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from server import QuestionCreate, client, db, question_content_hash, question_text_hashes, validation_message
+
+# Namespace for ids derived from content when a pack entry has no id
+PACK_ID_NAMESPACE = uuid.UUID('6f1c8a52-3d4e-4b7a-9c1e-2a5f0d8b7e31')
+
+
+def open_pack(path: str, mode: str) -> TextIO:
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class Throughput:
+    def __init__(self, label: str, every: float = 5.0):
+        self.label = label
+        self.every = every
+        self.count = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    def add(self, n: int):
+        self.count += n
+        now = time.monotonic()
+        if now - self.last_report >= self.every:
+            self.last_report = now
+            self.report()
+
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def report(self, final: bool = False):
+        elapsed = time.monotonic() - self.started
+        prefix = "Done" if final else "Progress"
+        print(f"{prefix}: {self.label} {self.count} questions in {elapsed:.1f}s ({self.rate():.0f} questions/s)")
+
+
+# Export
+
+def to_json_line(q: Dict) -> str:
+    if isinstance(q.get('created_at'), datetime):
+        q['created_at'] = q['created_at'].isoformat()
+    return json.dumps(q, ensure_ascii=False) + '\n'
+
+
+async def export_pack(path: str, batch_size: int):
+    meter = Throughput("exported")
+    cursor = db.questions.find({}, {'_id': 0}).sort('id', 1).batch_size(batch_size)
+    with open_pack(path, 'w') as out:
+        async for q in cursor:
+            out.write(to_json_line(q))
+            meter.add(1)
+    meter.report(final=True)
+
+
+# Import
+
+def read_lines(path: str, skip: int) -> Iterator[Tuple[int, str]]:
+    with open_pack(path, 'r') as f:
+        for line_no, line in enumerate(f):
+            if line_no >= skip and line.strip():
+                yield line_no, line
+
+
+def parse_questions(lines: Iterator[Tuple[int, str]], errors: List[str]) -> Iterator[Tuple[int, Dict]]:
+    for line_no, line in lines:
+        try:
+            raw = json.loads(line)
+            q_dict = QuestionCreate.model_validate(raw).dict()
+            created_at = raw.get('created_at')
+            q_dict['created_at'] = datetime.fromisoformat(created_at) if created_at else datetime.utcnow()
+        except (ValueError, TypeError) as e:
+            # TypeError: a created_at that is not a string
+            message = validation_message(e) if isinstance(e, ValidationError) else str(e)
+            errors.append(f"line {line_no + 1}: {message}")
+            continue
+        q_dict['content_hash'] = question_content_hash(q_dict)
+        q_dict['text_hashes'] = question_text_hashes(q_dict['translations'])
+        q_dict['id'] = raw.get('id') or str(uuid.uuid5(PACK_ID_NAMESPACE, q_dict['content_hash']))
+        yield line_no, q_dict
+
+
+def batched(items: Iterator[Tuple[int, Dict]], size: int) -> Iterator[Tuple[int, List[Dict]]]:
+    # Yields (last line number in batch, documents)
+    batch: List[Dict] = []
+    last_line = -1
+    for line_no, q_dict in items:
+        batch.append(q_dict)
+        last_line = line_no
+        if len(batch) >= size:
+            yield last_line, batch
+            batch = []
+    if batch:
+        yield last_line, batch
+
+
+def load_checkpoint(path: str, source: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('source') != os.path.abspath(source):
+        raise SystemExit(f"Checkpoint {path} belongs to {checkpoint.get('source')}; use --restart to discard it")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+async def import_pack(path: str, batch_size: int, checkpoint_path: str, restart: bool):
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    checkpoint = load_checkpoint(checkpoint_path, path) or {
+        'source': os.path.abspath(path), 'next_line': 0, 'upserted': 0, 'existing': 0
+    }
+    if checkpoint['next_line']:
+        print(f"Resuming {path} from line {checkpoint['next_line'] + 1}")
+
+    errors: List[str] = []
+    meter = Throughput("imported")
+    lines = read_lines(path, checkpoint['next_line'])
+    for last_line, batch in batched(parse_questions(lines, errors), batch_size):
+        # Upserting on id makes replaying a half-written batch harmless
+        try:
+            result = await db.questions.bulk_write(
+                [UpdateOne({'id': q['id']}, {'$setOnInsert': q}, upsert=True) for q in batch],
+                ordered=False
+            )
+            upserted = result.upserted_count
+        except BulkWriteError as e:
+            # Same content already stored under another id (unique content_hash)
+            if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+                raise
+            upserted = e.details.get('nUpserted', 0)
+        checkpoint['upserted'] += upserted
+        checkpoint['existing'] += len(batch) - upserted
+        checkpoint['next_line'] = last_line + 1
+        save_checkpoint(checkpoint_path, checkpoint)
+        meter.add(len(batch))
+
+    meter.report(final=True)
+    print(f"New: {checkpoint['upserted']}, already present: {checkpoint['existing']}, invalid: {len(errors)}")
+    for error in errors[:20]:
+        print(f"   {error}")
+    if len(errors) > 20:
+        print(f"   ... and {len(errors) - 20} more")
+    # No checkpoint is written when the pack had no valid lines
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import or export IQ Game question packs")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export_cmd = sub.add_parser('export', help="Write the questions collection to an NDJSON(.gz) file")
+    export_cmd.add_argument('path')
+    export_cmd.add_argument('--batch-size', type=int, default=1000)
+
+    import_cmd = sub.add_parser('import', help="Load an NDJSON(.gz) question pack")
+    import_cmd.add_argument('path')
+    import_cmd.add_argument('--batch-size', type=int, default=1000)
+    import_cmd.add_argument('--checkpoint', help="Checkpoint file (default: <path>.checkpoint)")
+    import_cmd.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == 'export':
+            asyncio.run(export_pack(args.path, args.batch_size))
+        else:
+            checkpoint = args.checkpoint or args.path + '.checkpoint'
+            asyncio.run(import_pack(args.path, args.batch_size, checkpoint, args.restart))
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,50 @@
-from fastapi import FastAPI, APIRouter, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from bson import ObjectId
+from typing import List, Optional, Dict, AsyncIterator, Tuple
+import json
+import re
+import hashlib
+import unicodedata
+from functools import lru_cache
 import uuid
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import random
+import asyncio
+import bisect
+import time
+from collections import deque, OrderedDict
+import numpy as np
+from array import array
+import secrets
+
+try:
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
+except ImportError:  # AI generation is optional
+    LlmChat = UserMessage = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+SAMPLE_QUESTIONS_PATH = ROOT_DIR / 'data' / 'sample_questions.json'
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ.get('DB_NAME', 'iq_game_db')]
+# How long startup waits for MongoDB before serving without it; the
+# in-memory read models then load from their refresh loops
+STARTUP_DB_TIMEOUT_SECONDS = float(os.environ.get('STARTUP_DB_TIMEOUT_SECONDS', '5'))
+database_status = {'reachable_at_startup': False}
 
 # Create the main app
 app = FastAPI(title="IQ Game API")
@@ -27,6 +53,129 @@ api_router = APIRouter(prefix="/api")
 # Supported languages
 LANGUAGES = ['tr', 'en', 'de', 'fr', 'es']
 DIFFICULTIES = ['easy', 'medium', 'hard']
+MODES = ['classic', 'time_race', 'daily', 'multiplayer', 'adaptive']
+CATEGORIES = ['logic', 'math', 'pattern', 'verbal', 'spatial']
+
+# Range calculate_iq clamps estimated IQs to
+IQ_MIN = 70
+IQ_MAX = 160
+MAX_QUESTIONS_PER_REQUEST = 50
+
+# Seconds between polls for questions added by other workers (0 disables polling)
+QUESTION_BANK_REFRESH_SECONDS = float(os.environ.get('QUESTION_BANK_REFRESH_SECONDS', '30'))
+# How far each poll for new documents reaches back, to cover clock skew between
+# workers and write-behind delay
+REFRESH_SLACK_SECONDS = float(os.environ.get('REFRESH_SLACK_SECONDS', '30'))
+
+# Entries kept in memory per leaderboard and seconds between polls for other
+# workers' scores (which also feed the rank histograms)
+LEADERBOARD_SIZE = int(os.environ.get('LEADERBOARD_SIZE', '100'))
+LEADERBOARD_REFRESH_SECONDS = float(os.environ.get('LEADERBOARD_REFRESH_SECONDS', '10'))
+LEADERBOARD_WINDOWS = ['all', 'daily', 'weekly', 'monthly']
+# Live leaderboard streams: rows pushed per board, pause that coalesces bursts of
+# scores into one update, and the period of the catch-all recompute (which picks
+# up other workers' scores and window rollover) and of keepalive comments
+LEADERBOARD_STREAM_SIZE = int(os.environ.get('LEADERBOARD_STREAM_SIZE', '50'))
+LEADERBOARD_STREAM_COALESCE_MS = float(os.environ.get('LEADERBOARD_STREAM_COALESCE_MS', '250'))
+LEADERBOARD_STREAM_REFRESH_SECONDS = float(os.environ.get('LEADERBOARD_STREAM_REFRESH_SECONDS', '10'))
+LEADERBOARD_STREAM_KEEPALIVE_SECONDS = float(os.environ.get('LEADERBOARD_STREAM_KEEPALIVE_SECONDS', '15'))
+
+# Write-behind buffering of score submissions
+SCORE_WRITE_BEHIND = os.environ.get('SCORE_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes')
+SCORE_BATCH_SIZE = int(os.environ.get('SCORE_BATCH_SIZE', '500'))
+SCORE_FLUSH_INTERVAL_MS = float(os.environ.get('SCORE_FLUSH_INTERVAL_MS', '200'))
+SCORE_BUFFER_MAX = int(os.environ.get('SCORE_BUFFER_MAX', '50000'))
+
+# Daily challenges are pre-built this many days ahead by a background scheduler
+DAILY_CHALLENGE_DAYS_AHEAD = int(os.environ.get('DAILY_CHALLENGE_DAYS_AHEAD', '3'))
+DAILY_SCHEDULER_INTERVAL_SECONDS = float(os.environ.get('DAILY_SCHEDULER_INTERVAL_SECONDS', '600'))
+# Daily challenge composition: questions per difficulty, days a question
+# may not repeat, and candidate pool size when sampling from MongoDB
+DAILY_CHALLENGE_MIX = {'easy': 3, 'medium': 4, 'hard': 3}
+# The daily mix spans difficulties, so daily games are always scored as this one
+DAILY_SCORE_DIFFICULTY = 'medium'
+DAILY_REPEAT_WINDOW_DAYS = int(os.environ.get('DAILY_REPEAT_WINDOW_DAYS', '14'))
+DAILY_SAMPLE_POOL = int(os.environ.get('DAILY_SAMPLE_POOL', '300'))
+
+# Seconds between flushes of buffered daily challenge completions
+DAILY_COMPLETIONS_FLUSH_SECONDS = float(os.environ.get('DAILY_COMPLETIONS_FLUSH_SECONDS', '5'))
+# Upper bound for Cache-Control max-age on the daily challenge (also capped at midnight)
+DAILY_CACHE_MAX_AGE = int(os.environ.get('DAILY_CACHE_MAX_AGE', '300'))
+
+# AI question generation: LLM backend ('emergent' or 'stub'), ready questions
+# buffered per (language, difficulty, category), and concurrent LLM calls
+AI_LLM_BACKEND = os.environ.get('AI_LLM_BACKEND', 'emergent')
+AI_STUB_LATENCY_MS = float(os.environ.get('AI_STUB_LATENCY_MS', '0'))
+# Fraction of stub calls that raise or hang, to exercise the failure handling
+AI_STUB_FAILURE_RATE = float(os.environ.get('AI_STUB_FAILURE_RATE', '0'))
+AI_STUB_HANG_RATE = float(os.environ.get('AI_STUB_HANG_RATE', '0'))
+# Per-attempt timeout, overall deadline of a call (retries and backoff included),
+# retries with jittered exponential backoff, and the circuit breaker that
+# fast-fails after consecutive failed calls until the reset period passes
+AI_LLM_TIMEOUT_SECONDS = float(os.environ.get('AI_LLM_TIMEOUT_SECONDS', '20'))
+AI_LLM_DEADLINE_SECONDS = float(os.environ.get('AI_LLM_DEADLINE_SECONDS', '30'))
+AI_LLM_RETRIES = int(os.environ.get('AI_LLM_RETRIES', '2'))
+AI_LLM_BACKOFF_MS = float(os.environ.get('AI_LLM_BACKOFF_MS', '250'))
+AI_BREAKER_THRESHOLD = int(os.environ.get('AI_BREAKER_THRESHOLD', '5'))
+AI_BREAKER_RESET_SECONDS = float(os.environ.get('AI_BREAKER_RESET_SECONDS', '30'))
+AI_POOL_SIZE = int(os.environ.get('AI_POOL_SIZE', '5'))
+AI_POOL_CONCURRENCY = int(os.environ.get('AI_POOL_CONCURRENCY', '2'))
+AI_POOL_PREFILL = os.environ.get('AI_POOL_PREFILL', 'false').lower() in ('1', 'true', 'yes')
+# Questions requested per LLM call in batch mode (1 disables batching in the pool),
+# and per-1K-token prices used for the cost estimate
+AI_BATCH_SIZE = int(os.environ.get('AI_BATCH_SIZE', '5'))
+AI_BATCH_MAX = 20
+# Batch prompts produce several questions in every language, so they get longer limits
+AI_BATCH_TIMEOUT_SECONDS = float(os.environ.get('AI_BATCH_TIMEOUT_SECONDS', '60'))
+AI_BATCH_DEADLINE_SECONDS = float(os.environ.get('AI_BATCH_DEADLINE_SECONDS', '90'))
+AI_INPUT_COST_PER_1K = float(os.environ.get('AI_INPUT_COST_PER_1K', '0.0004'))
+AI_OUTPUT_COST_PER_1K = float(os.environ.get('AI_OUTPUT_COST_PER_1K', '0.0016'))
+# Store new AI questions in the bank (category 'ai_generated') after deduplication.
+# Their answer keys are handed out with them, so graded games never use them
+AI_PERSIST_QUESTIONS = os.environ.get('AI_PERSIST_QUESTIONS', 'true').lower() in ('1', 'true', 'yes')
+AI_QUESTION_CATEGORY = 'ai_generated'
+
+# Multiplayer: players per room (a room can start with MP_MIN_PLAYERS once the
+# oldest has waited MP_MATCH_WAIT_SECONDS), rounds, and per-connection limits
+MP_ROOM_SIZE = int(os.environ.get('MP_ROOM_SIZE', '2'))
+MP_MIN_PLAYERS = int(os.environ.get('MP_MIN_PLAYERS', '2'))
+MP_MATCH_WAIT_SECONDS = float(os.environ.get('MP_MATCH_WAIT_SECONDS', '10'))
+MP_QUESTIONS = int(os.environ.get('MP_QUESTIONS', '10'))
+MP_ROUND_SECONDS = float(os.environ.get('MP_ROUND_SECONDS', '20'))
+MP_RESULT_PAUSE_SECONDS = float(os.environ.get('MP_RESULT_PAUSE_SECONDS', '3'))
+MP_OUTBOX_SIZE = int(os.environ.get('MP_OUTBOX_SIZE', '16'))
+MP_MAX_MESSAGE_BYTES = 1024
+MP_NAME_MAX = 24
+
+# Question payloads leave out correct_answer unless legacy clients that grade
+# locally still need it; scores without a session are refused unless disabled
+EXPOSE_ANSWER_KEYS = os.environ.get('EXPOSE_ANSWER_KEYS', 'false').lower() in ('1', 'true', 'yes')
+REQUIRE_SCORE_SESSION = os.environ.get('REQUIRE_SCORE_SESSION', 'true').lower() in ('1', 'true', 'yes')
+SCORE_POINTS = {'easy': 10, 'medium': 20, 'hard': 30}
+
+# Game sessions: lifetime and per-worker cap, questions issued per session, and the
+# time_race clock (start, bonus seconds per correct answer, grace for latency).
+# Sessions live in the memory of the worker that created them, so with several
+# workers /api/sessions/*, /api/adaptive/sessions/* and POST /api/scores need
+# sticky routing (client affinity at the load balancer). Tokens name their
+# worker, and a request for another worker's session fails with 421
+SESSION_TTL_SECONDS = float(os.environ.get('SESSION_TTL_SECONDS', '1800'))
+SESSION_MAX = int(os.environ.get('SESSION_MAX', '100000'))
+SESSION_QUESTIONS = int(os.environ.get('SESSION_QUESTIONS', '10'))
+TIME_RACE_QUESTIONS = int(os.environ.get('TIME_RACE_QUESTIONS', '50'))
+TIME_RACE_START_SECONDS = 30
+TIME_RACE_BONUS_SECONDS = {'easy': 5, 'medium': 7, 'hard': 10}
+TIME_RACE_GRACE_SECONDS = float(os.environ.get('TIME_RACE_GRACE_SECONDS', '2'))
+
+# Adaptive mode: questions per game, early stop once the ability estimate is this
+# precise, and how often item statistics (built by item_stats.py) are reloaded
+ADAPTIVE_MAX_QUESTIONS = int(os.environ.get('ADAPTIVE_MAX_QUESTIONS', '15'))
+ADAPTIVE_MIN_QUESTIONS = int(os.environ.get('ADAPTIVE_MIN_QUESTIONS', '5'))
+ADAPTIVE_TARGET_SE = float(os.environ.get('ADAPTIVE_TARGET_SE', '0.35'))
+ITEM_STATS_REFRESH_SECONDS = float(os.environ.get('ITEM_STATS_REFRESH_SECONDS', '300'))
+
+# Documents per insert_many call for bulk question imports
+BULK_INSERT_CHUNK_SIZE = int(os.environ.get('BULK_INSERT_CHUNK_SIZE', '500'))
 
 # Models
 class Question(BaseModel):
@@ -41,6 +190,29 @@ class QuestionCreate(BaseModel):
     difficulty: str
     translations: Dict[str, Dict]
 
+    @field_validator('difficulty')
+    @classmethod
+    def check_difficulty(cls, v: str) -> str:
+        if v not in DIFFICULTIES:
+            raise ValueError(f"difficulty must be one of {DIFFICULTIES}")
+        return v
+
+    @field_validator('translations')
+    @classmethod
+    def check_translations(cls, v: Dict[str, Dict]) -> Dict[str, Dict]:
+        if not v:
+            raise ValueError("at least one translation is required")
+        for lang, trans in v.items():
+            options = trans.get('options')
+            answer = trans.get('correct_answer')
+            if not isinstance(trans.get('question'), str) or not trans['question'].strip():
+                raise ValueError(f"{lang}: question text is required")
+            if not isinstance(options, list) or len(options) < 2:
+                raise ValueError(f"{lang}: at least 2 options are required")
+            if not isinstance(answer, int) or not 0 <= answer < len(options):
+                raise ValueError(f"{lang}: correct_answer must index into options")
+        return v
+
 class UserScore(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_name: str
@@ -61,6 +233,23 @@ class ScoreCreate(BaseModel):
     difficulty: str
     mode: str
     language: str
+    # Token of the game session the score comes from; required for a time bonus
+    session_token: Optional[str] = None
+
+    @field_validator('difficulty')
+    @classmethod
+    def check_difficulty(cls, v: str) -> str:
+        if v not in DIFFICULTIES:
+            raise ValueError(f"difficulty must be one of {DIFFICULTIES}")
+        return v
+
+    @field_validator('mode')
+    @classmethod
+    def check_mode(cls, v: str) -> str:
+        # Leaderboards keep a board per mode, so modes must come from a fixed set
+        if v not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        return v
 
 class DailyChallenge(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -73,6 +262,54 @@ class AIQuestionRequest(BaseModel):
     difficulty: str
     category: Optional[str] = None
 
+class AIBatchRequest(BaseModel):
+    difficulty: str
+    category: Optional[str] = None
+    count: int = 5
+
+class GameSessionCreate(BaseModel):
+    mode: str
+    difficulty: str
+    language: str = 'en'
+    category: Optional[str] = None
+    count: Optional[int] = None
+
+    @field_validator('mode')
+    @classmethod
+    def check_mode(cls, v: str) -> str:
+        # Adaptive games pick questions as they go and have their own endpoints
+        modes = [m for m in MODES if m != 'adaptive']
+        if v not in modes:
+            raise ValueError(f"mode must be one of {modes}")
+        return v
+
+    @field_validator('difficulty')
+    @classmethod
+    def check_difficulty(cls, v: str) -> str:
+        if v not in DIFFICULTIES:
+            raise ValueError(f"difficulty must be one of {DIFFICULTIES}")
+        return v
+
+    @field_validator('category')
+    @classmethod
+    def check_category(cls, v: Optional[str]) -> Optional[str]:
+        if v == AI_QUESTION_CATEGORY:
+            raise ValueError("AI generated questions cannot be used in scored games")
+        return v
+
+class SessionAnswer(BaseModel):
+    index: int
+    answer: int
+
+class SessionGrade(BaseModel):
+    answers: List[Optional[int]]
+
+class AdaptiveSessionCreate(BaseModel):
+    language: str = 'en'
+
+class AdaptiveAnswer(BaseModel):
+    answer: int
+
 # Privacy Policy HTML
 PRIVACY_POLICY_HTML = """
 <!DOCTYPE html>
@@ -329,7 +566,745 @@ def calculate_iq(correct: int, total: int, difficulty: str, time_bonus: int = 0)
     estimated_iq = int(base_iq + bonus + time_iq_bonus)
     
     # Clamp between 70 and 160
-    return max(70, min(160, estimated_iq))
+    return max(IQ_MIN, min(IQ_MAX, estimated_iq))
+
+# Helper functions for question payloads
+def question_projection(language: str) -> Dict:
+    # Only fetch the requested language plus the English fallback
+    projection = {'_id': 0, 'id': 1, 'category': 1, 'difficulty': 1, 'translations.en': 1}
+    projection[f'translations.{language}'] = 1
+    return projection
+
+def format_question(q: Dict, language: str) -> Dict:
+    trans = q.get('translations', {}).get(language, q.get('translations', {}).get('en', {}))
+    return {
+        'id': q['id'],
+        'category': q['category'],
+        'difficulty': q['difficulty'],
+        'question': trans.get('question', ''),
+        'options': trans.get('options', []),
+        'correct_answer': trans.get('correct_answer', 0)
+    }
+
+def normalize_question_text(text: str) -> str:
+    # Case, accents-as-composed, punctuation and spacing do not make a new question
+    text = unicodedata.normalize('NFKC', str(text)).casefold()
+    text = ''.join(ch if ch.isalnum() else ' ' for ch in text)
+    return ' '.join(text.split())
+
+def question_text_hash(question: str, options: List) -> str:
+    normalized = '|'.join([normalize_question_text(question)] + sorted(normalize_question_text(o) for o in options))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+def question_text_hashes(translations: Dict[str, Dict]) -> List[str]:
+    return sorted({question_text_hash(t.get('question', ''), t.get('options', [])) for t in translations.values()})
+
+# In-process question bank
+class AnswerKeyIndex:
+    """Correct option of every bank question in every language, one byte each.
+
+    Question slot i owns keys[i * len(LANGUAGES):(i + 1) * len(LANGUAGES)] in
+    LANGUAGES order, with MISSING for languages it cannot be shown in.
+    """
+
+    MISSING = 255
+    LANGUAGE_INDEX = {lang: i for i, lang in enumerate(LANGUAGES)}
+
+    def __init__(self):
+        self.slots: Dict[str, int] = {}
+        self.keys = bytearray()
+
+    @classmethod
+    def valid(cls, key) -> bool:
+        return isinstance(key, int) and not isinstance(key, bool) and 0 <= key < cls.MISSING
+
+    def add(self, question_id: str, keys: Dict[str, int]):
+        if question_id in self.slots:
+            return
+        row = bytearray([self.MISSING]) * len(LANGUAGES)
+        for lang, key in keys.items():
+            row[self.LANGUAGE_INDEX[lang]] = key
+        self.slots[question_id] = len(self.slots)
+        self.keys += row
+
+    def lookup(self, question_ids: List[str], language: str) -> bytes:
+        width, offset = len(LANGUAGES), self.LANGUAGE_INDEX[language]
+        keys, slots = self.keys, self.slots
+        return bytes(keys[slots[qid] * width + offset] for qid in question_ids)
+
+async def refresh_loop(cache, interval: float, name: str):
+    # Brings an in-process cache up to date with other workers' writes
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await cache.refresh()
+        except Exception as e:
+            logger.error(f"{name} refresh failed: {str(e)}")
+
+class CollectionTail:
+    """Documents inserted into a collection since the previous poll.
+
+    Polls by _id: an ObjectId carries the inserting client's clock at insert
+    time, so a score held in another worker's write-behind buffer is found
+    when it is flushed, not when it was submitted. Each poll reaches `slack`
+    seconds back to cover clock skew; ids already handed out, or applied
+    locally and marked, are remembered long enough never to repeat.
+    """
+
+    def __init__(self, collection: str, projection: Dict, slack: float):
+        self.collection = collection
+        self.projection = projection
+        self.slack = slack
+        self.since = datetime.utcnow()
+        self.seen: Dict[str, float] = {}  # document id -> monotonic time seen
+
+    def start(self, moment: datetime):
+        self.since = moment
+
+    def cutoff(self) -> ObjectId:
+        # Everything at or after this _id is still to be returned by poll()
+        return ObjectId.from_datetime(self.since - timedelta(seconds=self.slack))
+
+    def mark(self, doc_id: str):
+        self.seen[doc_id] = time.monotonic()
+
+    async def poll(self) -> List[Dict]:
+        polled_at = datetime.utcnow()
+        docs = []
+        async for doc in db[self.collection].find({'_id': {'$gte': self.cutoff()}}, self.projection):
+            if doc['id'] not in self.seen:
+                self.mark(doc['id'])
+                docs.append(doc)
+        self.since = polled_at
+        # Ids older than the re-read window (plus write-behind delay) cannot come back
+        expired = time.monotonic() - 3 * self.slack
+        self.seen = {doc_id: seen for doc_id, seen in self.seen.items() if seen > expired}
+        return docs
+
+class QuestionBank:
+    """Question collection cached in memory as pre-rendered per-language payloads.
+
+    Records are bucketed by (language, difficulty, category), with ``None``
+    acting as a wildcard, so sampling is O(limit) and never touches MongoDB.
+    AI generated questions are left out of the wildcard buckets, which serve
+    graded games, and are only reachable by naming their category.
+    A question is only listed under languages it can be shown in: its own
+    translations, or all languages when it has the English fallback.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.records: Dict[str, Dict[str, Dict]] = {}  # id -> {lang: payload without answer}
+        self.buckets: Dict[tuple, List[str]] = {}
+        self.text_hashes: set = set()
+        self.answer_keys = AnswerKeyIndex()
+        self.skipped: set = set()  # ids of stored questions with unusable answer keys
+        self.tail = CollectionTail('questions', {'_id': 0}, REFRESH_SLACK_SECONDS)
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _bucket_keys(q: Dict, language: str) -> List[tuple]:
+        d, c = q.get('difficulty'), q.get('category')
+        if c == AI_QUESTION_CATEGORY:
+            return [(language, d, c), (language, None, c)]
+        return [(language, d, c), (language, d, None), (language, None, c), (language, None, None)]
+
+    def _add(self, records: Dict, buckets: Dict, text_hashes: set, answer_keys: 'AnswerKeyIndex', q: Dict) -> bool:
+        # Whether the question is in the bank afterwards
+        if q['id'] in records:
+            return True
+        translations = q.get('translations', {})
+        languages = LANGUAGES if 'en' in translations else [lang for lang in LANGUAGES if lang in translations]
+        payloads = {lang: format_question(q, lang) for lang in languages}
+        # Documents stored before answers were validated may hold anything;
+        # such a question is left out rather than failing the whole load
+        if not all(AnswerKeyIndex.valid(payload['correct_answer']) for payload in payloads.values()):
+            logger.warning(f"Question {q['id']} skipped: invalid correct_answer")
+            return False
+        answer_keys.add(q['id'], {lang: payload.pop('correct_answer') for lang, payload in payloads.items()})
+        records[q['id']] = payloads
+        for lang in languages:
+            for key in self._bucket_keys(q, lang):
+                buckets.setdefault(key, []).append(q['id'])
+        text_hashes.update(q.get('text_hashes') or question_text_hashes(translations))
+        return True
+
+    async def load(self):
+        async with self._lock:
+            # Questions inserted during the scan are picked up by the next poll
+            self.tail.start(datetime.utcnow())
+            records: Dict[str, Dict[str, Dict]] = {}
+            buckets: Dict[tuple, List[str]] = {}
+            text_hashes: set = set()
+            answer_keys = AnswerKeyIndex()
+            skipped = set()
+            async for q in db.questions.find({}, {'_id': 0}):
+                if not self._add(records, buckets, text_hashes, answer_keys, q):
+                    skipped.add(q['id'])
+            # Swap in one step so readers never see a half-built bank
+            self.records, self.buckets, self.text_hashes = records, buckets, text_hashes
+            self.answer_keys, self.skipped = answer_keys, skipped
+            self.loaded = True
+            item_parameters.rebuild()
+        logger.info(f"Question bank loaded: {len(records)} questions")
+
+    async def refresh(self):
+        # Adds questions inserted since the last poll; only deletions, seen as
+        # a collection smaller than the bank, need a full reload
+        if not self.loaded or await db.questions.estimated_document_count() < len(self.records) + len(self.skipped):
+            await self.load()
+            return
+        self.add(await self.tail.poll())
+
+    def add(self, questions: List[Dict]):
+        if not self.loaded:
+            return
+        added = [q['id'] for q in questions if q['id'] not in self.records]
+        for q in questions:
+            if q['id'] not in self.skipped and not self._add(self.records, self.buckets, self.text_hashes, self.answer_keys, q):
+                self.skipped.add(q['id'])
+        added = [qid for qid in added if qid in self.records]
+        item_parameters.extend(added)
+
+    def sample(self, difficulty: Optional[str], category: Optional[str], language: str, limit: int) -> List[Dict]:
+        ids = self.buckets.get((language, difficulty, category), [])
+        chosen = random.sample(ids, min(limit, len(ids)))
+        return [self.records[qid][language] for qid in chosen]
+
+    def sample_strata(self, per_stratum: int) -> Dict[tuple, List[str]]:
+        # Up to `per_stratum` random ids from every (difficulty, category) bucket,
+        # limited to questions that can be rendered in every language
+        return {
+            key[1:]: random.sample(ids, min(per_stratum, len(ids)))
+            for key, ids in self.buckets.items()
+            if key[0] == 'en' and key[1] is not None and key[2] not in (None, AI_QUESTION_CATEGORY)
+        }
+
+    def get(self, question_ids: List[str], language: str) -> List[Dict]:
+        return [self.records[qid][language] for qid in question_ids if language in self.records.get(qid, {})]
+
+question_bank = QuestionBank()
+
+# Leaderboard read model
+class TopNBoard:
+    """Best N scores of one leaderboard, sorted by estimated IQ, oldest first on ties."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.keys: List[tuple] = []
+        self.entries: List[Dict] = []
+        self.ids: set = set()
+
+    def offer(self, score: Dict) -> bool:
+        # The same score can be offered twice (replayed while loading, or read
+        # back from the collection), so duplicates are recognised by id
+        if score.get('id') in self.ids:
+            return False
+        key = (-score['estimated_iq'], score.get('created_at') or datetime.min, score.get('id', ''))
+        if len(self.keys) >= self.size and key >= self.keys[-1]:
+            return False
+        pos = bisect.bisect_left(self.keys, key)
+        self.keys.insert(pos, key)
+        self.entries.insert(pos, score)
+        self.ids.add(score.get('id'))
+        if len(self.keys) > self.size:
+            self.keys.pop()
+            self.ids.discard(self.entries.pop().get('id'))
+        return True
+
+    def top(self, limit: int) -> List[Dict]:
+        return self.entries[:limit]
+
+def window_period(window: str, moment: datetime) -> str:
+    # Identifier of the UTC window containing `moment`; a new id means rollover
+    if window == 'daily':
+        return moment.strftime('%Y-%m-%d')
+    if window == 'weekly':
+        year, week, _ = moment.isocalendar()
+        return f"{year}-W{week:02d}"
+    if window == 'monthly':
+        return moment.strftime('%Y-%m')
+    return 'all'
+
+def window_start(window: str, moment: datetime) -> Optional[datetime]:
+    day = datetime(moment.year, moment.month, moment.day)
+    if window == 'daily':
+        return day
+    if window == 'weekly':
+        return day - timedelta(days=day.weekday())
+    if window == 'monthly':
+        return day.replace(day=1)
+    return None
+
+class Leaderboards:
+    """Top-N boards per (window, period, mode, difficulty), None meaning unfiltered.
+
+    Windowed boards are filled as scores arrive; when a window rolls over the
+    new period simply starts empty and boards of past periods are dropped.
+    Boards are built from MongoDB once; afterwards other workers' scores
+    arrive through score_feed.
+    """
+
+    FIELDS = {'_id': 0, 'id': 1, 'user_name': 1, 'score': 1, 'estimated_iq': 1,
+              'difficulty': 1, 'mode': 1, 'created_at': 1}
+
+    def __init__(self, size: int):
+        self.size = size
+        self.loaded = False
+        self.boards: Dict[tuple, TopNBoard] = {}
+        self.periods: Dict[str, str] = {}
+        self._pending: Optional[List[Dict]] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def board_keys(mode: Optional[str], difficulty: Optional[str]) -> List[tuple]:
+        return [(mode, difficulty), (mode, None), (None, difficulty), (None, None)]
+
+    def _offer(self, boards: Dict[tuple, TopNBoard], periods: Dict[str, str], entry: Dict) -> List[tuple]:
+        # Returns the (window, mode, difficulty) boards whose top N changed
+        changed = []
+        created_at = entry.get('created_at') or datetime.utcnow()
+        for window in LEADERBOARD_WINDOWS:
+            period = window_period(window, created_at)
+            if period != periods.get(window):
+                if periods.get(window) and period < periods[window]:
+                    continue  # late score for a window that already rolled over
+                periods[window] = period
+                for key in [k for k in boards if k[0] == window and k[1] != period]:
+                    del boards[key]
+            for mode, difficulty in self.board_keys(entry.get('mode'), entry.get('difficulty')):
+                key = (window, period, mode, difficulty)
+                board = boards.get(key)
+                if board is None:
+                    board = boards[key] = TopNBoard(self.size)
+                if board.offer(entry):
+                    changed.append((window, mode, difficulty))
+        return changed
+
+    async def load(self):
+        async with self._lock:
+            self._pending = []
+            try:
+                boards: Dict[tuple, TopNBoard] = {}
+                periods: Dict[str, str] = {}
+                now = datetime.utcnow()
+                # All-time boards: one indexed top-N query per filter combination
+                modes = [None] + await db.scores.distinct('mode')
+                difficulties = [None] + await db.scores.distinct('difficulty')
+                for mode in modes:
+                    for difficulty in difficulties:
+                        query = {}
+                        if mode:
+                            query['mode'] = mode
+                        if difficulty:
+                            query['difficulty'] = difficulty
+                        board = TopNBoard(self.size)
+                        async for s in db.scores.find(query, self.FIELDS).sort('estimated_iq', -1).limit(self.size):
+                            board.offer(s)
+                        if board.entries:
+                            boards[('all', 'all', mode, difficulty)] = board
+                periods['all'] = 'all'
+                # Windowed boards: one scan from the earliest current-period start,
+                # each score replayed into the windows it falls in
+                starts = {}
+                for window in LEADERBOARD_WINDOWS:
+                    start = window_start(window, now)
+                    if start is not None:
+                        starts[window] = start
+                        periods[window] = window_period(window, now)
+                if starts:
+                    async for s in db.scores.find({'created_at': {'$gte': min(starts.values())}}, self.FIELDS):
+                        for window, start in starts.items():
+                            if s['created_at'] < start:
+                                continue
+                            for mode, difficulty in self.board_keys(s.get('mode'), s.get('difficulty')):
+                                key = (window, periods[window], mode, difficulty)
+                                boards.setdefault(key, TopNBoard(self.size)).offer(s)
+                # Scores recorded by this worker while loading or not yet flushed
+                for entry in self._pending + score_writer.pending:
+                    self._offer(boards, periods, entry)
+                self.boards, self.periods = boards, periods
+                self.loaded = True
+            finally:
+                self._pending = None
+
+    def record(self, score: Dict) -> Optional[List[tuple]]:
+        # Changed boards, or None when not loaded and any board may have changed
+        entry = {field: score.get(field) for field in self.FIELDS if field != '_id'}
+        if self._pending is not None:
+            self._pending.append(entry)
+        if not self.loaded:
+            return None
+        return self._offer(self.boards, self.periods, entry)
+
+    def top(self, window: str, mode: Optional[str], difficulty: Optional[str], limit: int) -> Optional[List[Dict]]:
+        # None means the request cannot be answered from memory
+        if not self.loaded or limit > self.size:
+            return None
+        period = window_period(window, datetime.utcnow())
+        board = self.boards.get((window, period, mode, difficulty))
+        return board.top(limit) if board else []
+
+leaderboards = Leaderboards(LEADERBOARD_SIZE)
+
+class ScoreHistograms:
+    """Number of scores per estimated IQ for every (mode, difficulty) filter.
+
+    Since calculate_iq clamps to IQ_MIN..IQ_MAX, a rank is a sum over at
+    most 91 buckets regardless of how many scores exist. Counts are
+    aggregated once; later scores are added one by one, each exactly once.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.counts: Dict[tuple, List[int]] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _add(counts: Dict[tuple, List[int]], mode: Optional[str], difficulty: Optional[str], iq: int, n: int = 1):
+        bucket = max(IQ_MIN, min(IQ_MAX, iq)) - IQ_MIN
+        for key in Leaderboards.board_keys(mode, difficulty):
+            if key not in counts:
+                counts[key] = [0] * (IQ_MAX - IQ_MIN + 1)
+            counts[key][bucket] += n
+
+    async def load(self):
+        async with self._lock:
+            counts: Dict[tuple, List[int]] = {}
+            # Scores from score_feed's cutoff on are left to the feed
+            pipeline = [
+                {'$match': {'_id': {'$lt': score_feed.cutoff()}}},
+                {'$group': {
+                    '_id': {'mode': '$mode', 'difficulty': '$difficulty', 'iq': '$estimated_iq'},
+                    'n': {'$sum': 1}
+                }}
+            ]
+            async for row in db.scores.aggregate(pipeline):
+                key = row['_id']
+                if key.get('iq') is not None:
+                    self._add(counts, key.get('mode'), key.get('difficulty'), key['iq'], row['n'])
+            # Everything from the cutoff on comes from the feed again (the boards
+            # ignore repeats); unflushed scores are counted here instead
+            score_feed.tail.seen.clear()
+            for score in score_writer.pending:
+                self._add(counts, score['mode'], score['difficulty'], score['estimated_iq'])
+                score_feed.mark(score['id'])
+            self.counts = counts
+            self.loaded = True
+
+    def record(self, score: Dict) -> bool:
+        # Whether the score was counted; uncounted ones are left to score_feed
+        if not self.loaded:
+            return False
+        self._add(self.counts, score['mode'], score['difficulty'], score['estimated_iq'])
+        return True
+
+    def rank(self, mode: Optional[str], difficulty: Optional[str], iq: int) -> Optional[Dict]:
+        if not self.loaded:
+            return None
+        counts = self.counts.get((mode, difficulty))
+        if counts is None:
+            return build_rank(0, 0, 0)
+        # Stored scores never fall outside the clamp, so an IQ outside it is above or below all of them
+        if iq < IQ_MIN:
+            return build_rank(sum(counts), 0, sum(counts))
+        if iq > IQ_MAX:
+            return build_rank(0, sum(counts), sum(counts))
+        bucket = iq - IQ_MIN
+        above = sum(counts[bucket + 1:])
+        below = sum(counts[:bucket])
+        return build_rank(above, below, above + below + counts[bucket])
+
+score_histograms = ScoreHistograms()
+
+class ScoreFeed:
+    """Applies scores written by other workers to this worker's read models."""
+
+    def __init__(self, slack: float):
+        self.tail = CollectionTail('scores', Leaderboards.FIELDS, slack)
+
+    def cutoff(self) -> ObjectId:
+        return self.tail.cutoff()
+
+    def mark(self, score_id: str):
+        self.tail.mark(score_id)
+
+    async def refresh(self):
+        # Nothing is consumed until both read models can take it
+        if not leaderboards.loaded:
+            await leaderboards.load()
+        if not score_histograms.loaded:
+            await score_histograms.load()
+        for score in await self.tail.poll():
+            changed = leaderboards.record(score)
+            if changed:
+                leaderboard_streams.notify(changed)
+            score_histograms.record(score)
+
+score_feed = ScoreFeed(REFRESH_SLACK_SECONDS)
+
+def build_rank(above: int, below: int, total: int) -> Dict:
+    rank = above + 1
+    return {
+        'rank': rank,
+        'total': total,
+        'percentile': round(100 * below / total, 1) if total else 100.0,
+        # An IQ below every stored score ranks total + 1, which is still the bottom 100%
+        'top_percent': min(100.0, round(100 * rank / total, 1)) if total else 100.0
+    }
+
+def format_leaderboard(scores: List[Dict]) -> List[Dict]:
+    return [{
+        'rank': i + 1,
+        'user_name': s['user_name'],
+        'score': s['score'],
+        'estimated_iq': s['estimated_iq'],
+        'difficulty': s['difficulty'],
+        'mode': s['mode'],
+        'date': s['created_at'].strftime('%Y-%m-%d') if s.get('created_at') else ''
+    } for i, s in enumerate(scores)]
+
+# Write-behind score persistence
+class ScoreWriteBuffer:
+    """Acknowledged scores waiting to be written in insert_many batches.
+
+    A batch is flushed when SCORE_BATCH_SIZE documents are pending or every
+    SCORE_FLUSH_INTERVAL_MS, whichever comes first; close() drains the rest.
+    """
+
+    def __init__(self, batch_size: int, interval_ms: float, max_pending: int):
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000
+        self.max_pending = max_pending
+        self.pending: List[Dict] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'flushed': 0, 'failed': 0, 'batches': 0, 'retries': 0,
+                      'last_flush_ms': 0.0, 'max_flush_ms': 0.0, 'total_flush_ms': 0.0}
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, score: Dict):
+        if len(self.pending) >= self.max_pending:
+            # Backpressure: the database is not keeping up, write before accepting more
+            await self.flush()
+        self.pending.append(score)
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Score flush failed: {str(e)}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self.pending:
+                batch = self.pending[:self.batch_size]
+                del self.pending[:self.batch_size]
+                started = time.perf_counter()
+                failed = 0
+                try:
+                    await db.scores.insert_many(batch, ordered=False)
+                except BulkWriteError as e:
+                    # Duplicate ids were written by an earlier, partially failed attempt
+                    failed = sum(1 for err in e.details.get('writeErrors', []) if err.get('code') != 11000)
+                    if failed:
+                        logger.error(f"Dropped {failed} scores that could not be written")
+                except Exception:
+                    # Keep the batch for the next flush and let the caller log
+                    self.pending[:0] = batch
+                    self.stats['retries'] += 1
+                    raise
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.stats['batches'] += 1
+                self.stats['flushed'] += len(batch) - failed
+                self.stats['failed'] += failed
+                self.stats['last_flush_ms'] = elapsed_ms
+                self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], elapsed_ms)
+                self.stats['total_flush_ms'] += elapsed_ms
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self.pending:
+            await self.flush()
+
+    def metrics(self) -> Dict:
+        batches = self.stats['batches']
+        return {
+            'enabled': SCORE_WRITE_BEHIND,
+            'queue_depth': len(self.pending),
+            'flushed': self.stats['flushed'],
+            'failed': self.stats['failed'],
+            'batches': batches,
+            'retries': self.stats['retries'],
+            'last_flush_ms': round(self.stats['last_flush_ms'], 2),
+            'avg_flush_ms': round(self.stats['total_flush_ms'] / batches, 2) if batches else 0.0,
+            'max_flush_ms': round(self.stats['max_flush_ms'], 2)
+        }
+
+score_writer = ScoreWriteBuffer(SCORE_BATCH_SIZE, SCORE_FLUSH_INTERVAL_MS, SCORE_BUFFER_MAX)
+
+# Background tasks started with the app and cancelled on shutdown
+background_tasks: List[asyncio.Task] = []
+
+# MongoDB indexes, one per query shape used by the routes
+INDEXES = {
+    'questions': [
+        ([('id', 1)], {'unique': True}),
+        ([('content_hash', 1)], {'unique': True, 'sparse': True}),
+        ([('text_hashes', 1)], {}),
+        ([('difficulty', 1), ('category', 1)], {}),
+        ([('category', 1)], {}),
+        ([('created_at', -1)], {}),
+    ],
+    'scores': [
+        ([('id', 1)], {'unique': True}),
+        ([('created_at', -1)], {}),
+        ([('estimated_iq', -1)], {}),
+        ([('mode', 1), ('estimated_iq', -1)], {}),
+        ([('difficulty', 1), ('estimated_iq', -1)], {}),
+        ([('mode', 1), ('difficulty', 1), ('estimated_iq', -1)], {}),
+    ],
+    'daily_challenges': [
+        ([('date', 1)], {'unique': True}),
+    ],
+    'item_stats': [
+        ([('id', 1)], {'unique': True}),
+        ([('updated_at', -1)], {}),
+    ],
+}
+
+async def dedupe_daily_challenges() -> int:
+    # Racing workers could store several challenges for one date before the
+    # unique date index existed, which also blocks building it. Keeps the first
+    # challenge of each date and moves the others' completions onto it.
+    removed = 0
+    pipeline = [
+        {'$group': {'_id': '$date', 'ids': {'$push': '$_id'}, 'n': {'$sum': 1}}},
+        {'$match': {'n': {'$gt': 1}}}
+    ]
+    async for group in db.daily_challenges.aggregate(pipeline):
+        keep, *extra = sorted(group['ids'])
+        completions = 0
+        async for doc in db.daily_challenges.find({'_id': {'$in': extra}}, {'completions': 1}):
+            completions += doc.get('completions', 0)
+        await db.daily_challenges.update_one({'_id': keep}, {'$inc': {'completions': completions}})
+        removed += (await db.daily_challenges.delete_many({'_id': {'$in': extra}})).deleted_count
+        logger.warning(f"Removed {len(extra)} duplicate daily challenges for {group['_id']}")
+    return removed
+
+async def ensure_indexes() -> List[str]:
+    # Returns the indexes that could not be built (e.g. duplicates blocking a unique index)
+    await dedupe_daily_challenges()
+
+    async def build(collection: str, keys, options: Dict) -> Optional[str]:
+        try:
+            await db[collection].create_index(keys, **options)
+        except Exception as e:
+            logger.error(f"Index creation failed on {collection} {keys}: {str(e)}")
+            return f"{collection} {keys}: {str(e)}"
+        return None
+
+    # Concurrently, so an unreachable server costs one selection timeout, not one per index
+    results = await asyncio.gather(*(
+        build(collection, keys, options)
+        for collection, indexes in INDEXES.items() for keys, options in indexes
+    ))
+    return [failure for failure in results if failure]
+
+def query_plan_checks() -> List[tuple]:
+    # (name, collection, filter, sort) for every query the routes issue
+    checks = [
+        ('questions by id', db.questions, {'id': {'$in': ['x']}}, None),
+        ('questions by content_hash', db.questions, {'content_hash': 'x'}, None),
+        ('questions by text hash', db.questions, {'text_hashes': 'x'}, None),
+        ('questions by difficulty', db.questions, {'difficulty': 'easy'}, None),
+        ('questions by category', db.questions, {'category': 'logic'}, None),
+        ('questions by difficulty and category', db.questions, {'difficulty': 'easy', 'category': 'logic'}, None),
+        ('questions newest first', db.questions, {}, [('created_at', -1)]),
+        ('scores newest first', db.scores, {}, [('created_at', -1)]),
+        ('scores in current window', db.scores, {'created_at': {'$gte': window_start('daily', datetime.utcnow())}}, None),
+        ('daily challenge by date', db.daily_challenges, {'date': date.today().isoformat()}, None),
+        ('daily challenges in repeat window', db.daily_challenges, {'date': {'$gte': '2000-01-01', '$lte': '2100-01-01'}}, None),
+    ]
+    leaderboard_filters = [{}, {'mode': 'classic'}, {'difficulty': 'easy'}, {'mode': 'classic', 'difficulty': 'easy'}]
+    for query in leaderboard_filters:
+        name = ' and '.join(query) or 'all'
+        checks.append((f"leaderboard ({name})", db.scores, query, [('estimated_iq', -1)]))
+    return checks
+
+def pipeline_plan_checks() -> List[tuple]:
+    # (name, collection, pipeline, full_scan) for the aggregations routes and read
+    # models run. full_scan marks passes meant to read every candidate (sampling
+    # the whole pool, whole-collection counts), where a COLLSCAN is expected
+    graded = {'category': {'$ne': AI_QUESTION_CATEGORY}, 'translations.en': {'$exists': True}}
+    sample = {'$sample': {'size': 10}}
+    return [
+        ('question sample by difficulty', db.questions, [{'$match': {'difficulty': 'easy', **graded}}, sample], False),
+        ('question sample by difficulty and category', db.questions,
+         [{'$match': {**graded, 'difficulty': 'easy', 'category': 'logic'}}, sample], False),
+        ('question sample, any difficulty', db.questions, [{'$match': graded}, sample], True),
+        ('daily question pool', db.questions, [{'$match': {'id': {'$nin': ['x']}, **graded}}, sample], True),
+        ('score histograms', db.scores, [
+            {'$match': {'_id': {'$lt': ObjectId()}}},
+            {'$group': {'_id': {'mode': '$mode', 'difficulty': '$difficulty', 'iq': '$estimated_iq'}, 'n': {'$sum': 1}}}
+        ], True),
+        ('duplicate daily challenges', db.daily_challenges, [
+            {'$group': {'_id': '$date', 'ids': {'$push': '$_id'}, 'n': {'$sum': 1}}},
+            {'$match': {'n': {'$gt': 1}}}
+        ], True),
+    ]
+
+def winning_plans(explain) -> List[Dict]:
+    # Aggregation explains nest the query planner (under $cursor, or per shard)
+    if isinstance(explain, dict):
+        if 'winningPlan' in explain:
+            return [explain['winningPlan']]
+        return [plan for value in explain.values() for plan in winning_plans(value)]
+    if isinstance(explain, list):
+        return [plan for item in explain for plan in winning_plans(item)]
+    return []
+
+def plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+async def verify_query_plans() -> Dict:
+    results = []
+    for name, collection, query, sort in query_plan_checks():
+        cursor = collection.find(query).limit(20)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = plan_stages(explain.get('queryPlanner', {}).get('winningPlan', {}))
+        problems = [stage for stage in stages if stage in ('COLLSCAN', 'SORT')]
+        results.append({'name': name, 'stages': stages, 'problems': problems, 'full_scan': False})
+    for name, collection, pipeline, full_scan in pipeline_plan_checks():
+        explain = await db.command('aggregate', collection.name, pipeline=pipeline, explain=True)
+        stages = plan_stages(winning_plans(explain))
+        problems = [stage for stage in stages if stage == 'SORT' or (stage == 'COLLSCAN' and not full_scan)]
+        results.append({'name': name, 'stages': stages, 'problems': problems, 'full_scan': full_scan})
+    return {'ok': not any(r['problems'] for r in results), 'queries': results}
 
 # Routes
 @api_router.get("/")
@@ -340,6 +1315,30 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@api_router.get("/metrics")
+async def metrics():
+    return {
+        'score_writer': score_writer.metrics(),
+        'daily_completions': completion_counter.metrics(),
+        'ai_pool': ai_pool.metrics(),
+        'ai_batches': ai_batch_stats.metrics(),
+        'ai_llm': {
+            **(llm_client.metrics() if llm_client else {'configured': False}),
+            'fallbacks': ai_fallbacks
+        },
+        'multiplayer': room_manager.metrics(),
+        'leaderboard_streams': leaderboard_streams.metrics(),
+        'sessions': game_sessions.metrics(),
+        'item_parameters': item_parameters.metrics()
+    }
+
+@api_router.get("/diagnostics/query-plans")
+async def query_plans():
+    report = await verify_query_plans()
+    if not report['ok']:
+        raise HTTPException(status_code=500, detail=report)
+    return report
+
 # Privacy Policy endpoint
 @api_router.get("/privacy-policy", response_class=HTMLResponse)
 async def privacy_policy():
@@ -359,63 +1358,697 @@ async def get_questions(
     if category:
         query['category'] = category
     
-    questions = await db.questions.find(query).to_list(limit * 3)
-    
-    # Shuffle and limit
-    random.shuffle(questions)
-    questions = questions[:limit]
-    
-    # Format for response
-    result = []
-    for q in questions:
-        trans = q.get('translations', {}).get(language, q.get('translations', {}).get('en', {}))
-        result.append({
-            'id': q['id'],
-            'category': q['category'],
-            'difficulty': q['difficulty'],
-            'question': trans.get('question', ''),
-            'options': trans.get('options', []),
-            'correct_answer': trans.get('correct_answer', 0)
-        })
+    if language not in LANGUAGES:
+        language = 'en'
+    limit = max(1, min(limit, MAX_QUESTIONS_PER_REQUEST))
     
-    return result
+    questions, keys = await select_questions(query, language, limit)
+    return with_answer_keys(questions, keys) if EXPOSE_ANSWER_KEYS else questions
 
-@api_router.post("/questions")
-async def create_question(question: QuestionCreate):
+def split_answer_keys(questions: List[Dict]) -> Tuple[List[Dict], bytes]:
+    # Payloads without correct_answer, and the answers in the same order
+    public = [{k: v for k, v in q.items() if k != 'correct_answer'} for q in questions]
+    return public, bytes(q['correct_answer'] for q in questions)
+
+def with_answer_keys(questions: List[Dict], keys: bytes) -> List[Dict]:
+    return [{**q, 'correct_answer': key} for q, key in zip(questions, keys)]
+
+async def select_questions(query: Dict, language: str, limit: int) -> Tuple[List[Dict], bytes]:
+    # Random questions matching `query` (difficulty/category) and their answer keys
+    if question_bank.loaded:
+        questions = question_bank.sample(query.get('difficulty'), query.get('category'), language, limit)
+        return questions, question_bank.answer_keys.lookup([q['id'] for q in questions], language)
+    
+    # Sample server-side so the whole pool is reachable and only `limit`
+    # documents (with just the requested language) leave the database
+    query.setdefault('category', {'$ne': AI_QUESTION_CATEGORY})
+    if language != 'en':
+        query['$or'] = [{f'translations.{language}': {'$exists': True}}, {'translations.en': {'$exists': True}}]
+    else:
+        query['translations.en'] = {'$exists': True}
+    pipeline = [
+        {'$match': query},
+        {'$sample': {'size': limit}},
+        {'$project': question_projection(language)}
+    ]
+    questions = await db.questions.aggregate(pipeline).to_list(limit)
+    questions = [format_question(q, language) for q in questions]
+    return split_answer_keys([q for q in questions if AnswerKeyIndex.valid(q['correct_answer'])])
+
+def question_content_hash(q: Dict) -> str:
+    # Stable fingerprint of a question's content, independent of id/created_at
+    content = {'category': q['category'], 'difficulty': q['difficulty'], 'translations': q['translations']}
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def new_question_doc(question: QuestionCreate) -> Dict:
     q_dict = question.dict()
     q_dict['id'] = str(uuid.uuid4())
+    q_dict['content_hash'] = question_content_hash(q_dict)
+    q_dict['text_hashes'] = question_text_hashes(q_dict['translations'])
     q_dict['created_at'] = datetime.utcnow()
-    await db.questions.insert_one(q_dict)
+    return q_dict
+
+def validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+    )
+
+@api_router.post("/questions")
+async def create_question(question: QuestionCreate):
+    q_dict = new_question_doc(question)
+    try:
+        await db.questions.insert_one(q_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Question already exists")
+    question_bank.add([q_dict])
     return {"id": q_dict['id'], "message": "Question created"}
 
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, object]]:
+    # Yields (index, parsed item or Exception) without buffering the whole body
+    index = 0
+    buffer = b''
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                try:
+                    yield index, json.loads(line)
+                except ValueError as e:
+                    yield index, e
+                index += 1
+    if buffer.strip():
+        try:
+            yield index, json.loads(buffer)
+        except ValueError as e:
+            yield index, e
+
+class BulkQuestionIngest:
+    """Validates questions one by one and writes them in unordered insert_many chunks."""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.pending: List[Tuple[int, Dict]] = []
+        self.ids: Dict[int, str] = {}
+        self.errors: List[Dict] = []
+        self.total = 0
+
+    def validate(self, index: int, item: object) -> Optional[Dict]:
+        self.total += 1
+        if isinstance(item, Exception):
+            self.errors.append({'index': index, 'error': f"invalid JSON: {str(item)}"})
+            return None
+        try:
+            return new_question_doc(QuestionCreate.model_validate(item))
+        except ValidationError as e:
+            self.errors.append({'index': index, 'error': validation_message(e)})
+            return None
+
+    async def add(self, index: int, q_dict: Dict):
+        self.pending.append((index, q_dict))
+        if len(self.pending) >= self.chunk_size:
+            await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        failed = {}
+        try:
+            await db.questions.insert_many([q for _, q in batch], ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get('writeErrors', []):
+                if err.get('code') == 11000:
+                    failed[err['index']] = "duplicate question"
+                else:
+                    failed[err['index']] = err.get('errmsg', 'write failed')
+        inserted = []
+        for pos, (index, q_dict) in enumerate(batch):
+            if pos in failed:
+                self.errors.append({'index': index, 'error': failed[pos]})
+            else:
+                self.ids[index] = q_dict['id']
+                inserted.append(q_dict)
+        question_bank.add(inserted)
+
+    def report(self) -> Dict:
+        return {
+            "message": f"{len(self.ids)} questions created",
+            "total": self.total,
+            "inserted": len(self.ids),
+            "failed": len(self.errors),
+            "ids": [{'index': i, 'id': qid} for i, qid in sorted(self.ids.items())],
+            "errors": sorted(self.errors, key=lambda err: err['index'])
+        }
+
 @api_router.post("/questions/bulk")
-async def create_bulk_questions(questions: List[QuestionCreate]):
-    for question in questions:
-        q_dict = question.dict()
-        q_dict['id'] = str(uuid.uuid4())
-        q_dict['created_at'] = datetime.utcnow()
-        await db.questions.insert_one(q_dict)
-    return {"message": f"{len(questions)} questions created"}
+async def create_bulk_questions(request: Request, chunk_size: int = BULK_INSERT_CHUNK_SIZE):
+    # Accepts a JSON array of QuestionCreate objects, or an NDJSON stream
+    # (Content-Type: application/x-ndjson) with one question per line
+    ingest = BulkQuestionIngest(max(1, chunk_size))
+    content_type = request.headers.get('content-type', '')
+    
+    if 'ndjson' in content_type or 'jsonlines' in content_type:
+        async for index, item in iter_ndjson(request.stream()):
+            q_dict = ingest.validate(index, item)
+            if q_dict is not None:
+                await ingest.add(index, q_dict)
+    else:
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be valid JSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=422, detail="Request body must be a list of questions")
+        # Validate the whole payload before writing anything
+        valid = [(i, ingest.validate(i, item)) for i, item in enumerate(items)]
+        for index, q_dict in valid:
+            if q_dict is not None:
+                await ingest.add(index, q_dict)
+    
+    await ingest.flush()
+    return ingest.report()
+
+# Game sessions
+WORKER_ID = secrets.token_hex(4)
+
+def new_session_token() -> str:
+    return f"{WORKER_ID}.{secrets.token_urlsafe(16)}"
+
+class GameSession:
+    """Question set, answer key and answer log of one game.
+
+    The answer key is copied out of the AnswerKeyIndex when the session starts,
+    so grading stays correct across bank reloads. Answers are one byte each
+    (UNANSWERED until recorded) and their times are float32 seconds since the
+    start, so a session stays a few hundred bytes.
+    """
+
+    __slots__ = ('token', 'mode', 'difficulty', 'day', 'question_ids', 'answer_key', 'answers',
+                 'answered_at', 'started', 'expires', 'graded')
+
+    UNANSWERED = 255
+
+    def __init__(self, mode: str, difficulty: str, question_ids: Tuple[str, ...], answer_key: bytes, ttl: float,
+                 day: Optional[str] = None):
+        self.token = new_session_token()
+        self.mode = mode
+        self.difficulty = difficulty
+        self.day = day
+        self.question_ids = question_ids
+        self.answer_key = answer_key
+        self.answers = bytearray([self.UNANSWERED]) * len(question_ids)
+        self.answered_at = array('f', bytes(4 * len(question_ids)))
+        self.started = time.monotonic()
+        self.expires = self.started + ttl
+        self.graded = False
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def keys_hidden(self) -> bool:
+        # Everyone gets the same daily questions, so until that day is over
+        # the key, per-question correctness and grading totals are withheld.
+        # The submitted score still shows the player's total, so this stops
+        # casual reveals, not a client probing with many daily sessions
+        return self.day is not None and date.today().isoformat() <= self.day
+
+    def revealed_keys(self) -> List[Optional[int]]:
+        return [None if a == self.UNANSWERED else key for a, key in zip(self.answers, self.answer_key)]
+
+    def time_up(self) -> bool:
+        if self.mode != 'time_race':
+            return False
+        deadline, _ = self.time_race_clock()
+        return self.elapsed() > deadline + TIME_RACE_GRACE_SECONDS
+
+    def record(self, index: int, answer: int) -> bool:
+        self.answers[index] = answer
+        self.answered_at[index] = self.elapsed()
+        return answer == self.answer_key[index]
+
+    def time_race_clock(self) -> Tuple[float, int]:
+        # Replays the answers in time order: (deadline, bonus seconds earned)
+        bonus_per_answer = TIME_RACE_BONUS_SECONDS.get(self.difficulty, 0)
+        deadline, bonus = float(TIME_RACE_START_SECONDS), 0
+        answered = [i for i, a in enumerate(self.answers) if a != self.UNANSWERED]
+        for i in sorted(answered, key=self.answered_at.__getitem__):
+            if self.answered_at[i] > deadline + TIME_RACE_GRACE_SECONDS:
+                break
+            if self.answers[i] == self.answer_key[i]:
+                deadline += bonus_per_answer
+                bonus += bonus_per_answer
+        return deadline, bonus
+
+    def result(self) -> Dict:
+        # UNANSWERED never matches a key, so skipped questions count as wrong
+        results = [answer == key for answer, key in zip(self.answers, self.answer_key)]
+        correct = sum(results)
+        time_bonus = self.time_race_clock()[1] if self.mode == 'time_race' else 0
+        return {
+            'correct_answers': correct,
+            'total_questions': len(results),
+            'score': correct * SCORE_POINTS.get(self.difficulty, 0),
+            'difficulty': self.difficulty,
+            'time_bonus': time_bonus,
+            'estimated_iq': calculate_iq(correct, len(results), self.difficulty, time_bonus),
+            'results': results,
+            # Kept with the score for item_stats.py; None marks a skipped question
+            'responses': {
+                'question_ids': list(self.question_ids),
+                'correct': [None if a == self.UNANSWERED else r for a, r in zip(self.answers, results)]
+            }
+        }
+
+class GameSessions:
+    """Live sessions of this worker, oldest first.
+
+    Every session has the same lifetime, so expired ones are always at the
+    front and eviction only looks there; SESSION_MAX bounds memory outright.
+    """
+
+    def __init__(self, ttl: float, max_sessions: int):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sessions: 'OrderedDict[str, GameSession]' = OrderedDict()
+        self.stats = {'created': 0, 'expired': 0, 'evicted': 0, 'submitted': 0, 'answers': 0, 'graded': 0, 'misrouted': 0}
+
+    def evict(self):
+        now = time.monotonic()
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.expires > now:
+                break
+            self.sessions.popitem(last=False)
+            self.stats['expired'] += 1
+        while len(self.sessions) >= self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.stats['evicted'] += 1
+
+    def create(self, mode: str, difficulty: str, question_ids: Tuple[str, ...], answer_key: bytes,
+               day: Optional[str] = None) -> GameSession:
+        return self.add(GameSession(mode, difficulty, question_ids, answer_key, self.ttl, day))
+
+    def add(self, session):
+        self.evict()
+        self.sessions[session.token] = session
+        self.stats['created'] += 1
+        return session
+
+    def get(self, token: str) -> Optional[GameSession]:
+        session = self.sessions.get(token)
+        if session is not None and session.expires <= time.monotonic():
+            del self.sessions[token]
+            self.stats['expired'] += 1
+            return None
+        return session
+
+    def not_found(self, token: str) -> HTTPException:
+        # Error for a token get() did not find: expired here, or issued by another worker
+        if token.partition('.')[0] == WORKER_ID:
+            return HTTPException(status_code=404, detail="Session not found or expired")
+        self.stats['misrouted'] += 1
+        if self.stats['misrouted'] == 1:
+            logger.error("Game session requested from a worker that did not create it; "
+                         "several workers need sticky routing for session and score requests")
+        return HTTPException(status_code=421, detail="Session belongs to another server worker or was lost in a restart")
+
+    def pop(self, token: str) -> Optional[GameSession]:
+        session = self.get(token)
+        if session is not None:
+            del self.sessions[token]
+            self.stats['submitted'] += 1
+        return session
+
+    def metrics(self) -> Dict:
+        return {'active': len(self.sessions), **self.stats}
+
+game_sessions = GameSessions(SESSION_TTL_SECONDS, SESSION_MAX)
+
+@api_router.post("/sessions")
+async def create_game_session(request: GameSessionCreate):
+    # Questions are sent without answers; the session keeps the key
+    language = request.language if request.language in LANGUAGES else 'en'
+    difficulty, today = request.difficulty, None
+    if request.mode == 'daily':
+        difficulty = DAILY_SCORE_DIFFICULTY
+        today = date.today().isoformat()
+        entry = daily_challenge_cache.get(today) or await prepare_daily_challenge(today)
+        questions, keys = split_answer_keys(entry['questions'][language])
+    else:
+        count = request.count or (TIME_RACE_QUESTIONS if request.mode == 'time_race' else SESSION_QUESTIONS)
+        query = {'difficulty': request.difficulty}
+        if request.category:
+            query['category'] = request.category
+        questions, keys = await select_questions(query, language, max(1, min(count, MAX_QUESTIONS_PER_REQUEST)))
+    if not questions:
+        raise HTTPException(status_code=404, detail="No questions available")
+    
+    session = game_sessions.create(request.mode, difficulty, tuple(q['id'] for q in questions), keys, today)
+    response = {
+        'session_token': session.token,
+        'mode': session.mode,
+        'difficulty': session.difficulty,
+        'expires_in': int(game_sessions.ttl),
+        'questions': questions
+    }
+    if session.mode == 'time_race':
+        response['time_limit'] = TIME_RACE_START_SECONDS
+        response['bonus_seconds'] = TIME_RACE_BONUS_SECONDS[session.difficulty]
+    return response
+
+@api_router.post("/sessions/{token}/answers")
+async def record_session_answer(token: str, answer: SessionAnswer):
+    # Kept in memory only; the score submission is the single write per game
+    session = game_sessions.get(token)
+    if session is None:
+        raise game_sessions.not_found(token)
+    if not isinstance(session, GameSession):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    if not 0 <= answer.index < len(session.question_ids):
+        raise HTTPException(status_code=422, detail="index out of range")
+    if not 0 <= answer.answer < GameSession.UNANSWERED:
+        raise HTTPException(status_code=422, detail="answer out of range")
+    if session.graded or session.answers[answer.index] != GameSession.UNANSWERED:
+        raise HTTPException(status_code=409, detail="Question already answered")
+    if session.time_up():
+        raise HTTPException(status_code=409, detail="Time is up")
+    
+    # The key is revealed only once the answer is on record
+    correct = session.record(answer.index, answer.answer)
+    result = {'index': answer.index}
+    if not session.keys_hidden():
+        result['correct'] = correct
+        result['correct_answer'] = session.answer_key[answer.index]
+    game_sessions.stats['answers'] += 1
+    if session.mode == 'time_race':
+        deadline, _ = session.time_race_clock()
+        result['time_left'] = round(max(0.0, deadline - session.elapsed()), 1)
+    return result
+
+@api_router.post("/sessions/{token}/grade")
+async def grade_session(token: str, grade: SessionGrade):
+    # Records any answers not sent one by one (null = skipped), then grades
+    # the whole answer vector; no further answers are accepted afterwards
+    session = game_sessions.get(token)
+    if session is None:
+        raise game_sessions.not_found(token)
+    if not isinstance(session, GameSession):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    if len(grade.answers) > len(session.question_ids):
+        raise HTTPException(status_code=422, detail="More answers than questions")
+    if not session.graded and not session.time_up():
+        for index, answer in enumerate(grade.answers):
+            if answer is not None and 0 <= answer < GameSession.UNANSWERED and session.answers[index] == GameSession.UNANSWERED:
+                session.record(index, answer)
+    session.graded = True
+    game_sessions.stats['graded'] += 1
+    result = session.result()
+    del result['responses']
+    if session.keys_hidden():
+        # Any total (count, score, IQ) would tell a one-answer session whether it was right
+        return {'total_questions': result['total_questions'], 'difficulty': result['difficulty']}
+    return {**result, 'answer_key': session.revealed_keys()}
+
+# Adaptive mode
+class ItemParameters:
+    """2PL parameters (discrimination a, difficulty b) of every bank question.
+
+    Estimates come from the item_stats collection built offline by
+    item_stats.py; questions without enough history fall back to a prior
+    taken from their difficulty label. Parameters live in NumPy arrays aligned
+    with the question bank, so choosing the next item is one vectorized pass.
+    The arrays follow the bank as it changes (rebuilt when it or the
+    statistics are loaded, extended when questions are added), never inside
+    a request.
+    """
+
+    PRIOR_B = {'easy': -1.0, 'medium': 0.0, 'hard': 1.0}
+
+    def __init__(self):
+        self.loaded = False
+        self.stats: Dict[str, Tuple[float, float]] = {}  # id -> (a, b)
+        self.fingerprint = None
+        self.ids: List[str] = []
+        self.slots: Dict[str, int] = {}
+        self.a = np.ones(0)
+        self.b = np.zeros(0)
+        self.languages: Dict[str, np.ndarray] = {lang: np.zeros(0, dtype=bool) for lang in LANGUAGES}
+
+    async def fetch_fingerprint(self):
+        count = await db.item_stats.estimated_document_count()
+        latest = await db.item_stats.find_one({}, {'_id': 0, 'updated_at': 1}, sort=[('updated_at', -1)])
+        return count, latest.get('updated_at') if latest else None
+
+    async def load(self):
+        fingerprint = await self.fetch_fingerprint()
+        stats = {}
+        async for doc in db.item_stats.find({}, {'_id': 0, 'id': 1, 'a': 1, 'b': 1}):
+            stats[doc['id']] = (float(doc['a']), float(doc['b']))
+        self.stats, self.fingerprint = stats, fingerprint
+        self.loaded = True
+        self.rebuild()
+        logger.info(f"Item statistics loaded: {len(stats)} questions")
+
+    async def refresh(self):
+        if await self.fetch_fingerprint() != self.fingerprint:
+            await self.load()
+
+    def _rows(self, question_ids: List[str]) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        records = question_bank.records
+        a = np.ones(len(question_ids))
+        b = np.zeros(len(question_ids))
+        for i, qid in enumerate(question_ids):
+            if qid in self.stats:
+                a[i], b[i] = self.stats[qid]
+            else:
+                payload = next(iter(records[qid].values()), None)
+                b[i] = self.PRIOR_B.get(payload['difficulty'], 0.0) if payload else 0.0
+        # AI generated questions stay unselectable: their keys are public
+        graded = [all(p['category'] != AI_QUESTION_CATEGORY for p in records[qid].values()) for qid in question_ids]
+        languages = {
+            lang: np.fromiter((ok and lang in records[qid] for ok, qid in zip(graded, question_ids)),
+                              dtype=bool, count=len(question_ids))
+            for lang in LANGUAGES
+        }
+        return a, b, languages
+
+    def rebuild(self):
+        # Whole-bank pass; swapped in at once so next_item never sees a mix
+        ids = list(question_bank.records)
+        a, b, languages = self._rows(ids)
+        self.ids, self.a, self.b, self.languages = ids, a, b, languages
+        self.slots = {qid: i for i, qid in enumerate(ids)}
+
+    def extend(self, question_ids: List[str]):
+        # Rows for questions just added to the bank, appended in bank order
+        new = [qid for qid in dict.fromkeys(question_ids) if qid not in self.slots]
+        if not new:
+            return
+        a, b, languages = self._rows(new)
+        self.slots.update((qid, len(self.ids) + i) for i, qid in enumerate(new))
+        self.ids = self.ids + new
+        self.a = np.concatenate((self.a, a))
+        self.b = np.concatenate((self.b, b))
+        self.languages = {lang: np.concatenate((self.languages[lang], languages[lang])) for lang in LANGUAGES}
+
+    def next_item(self, theta: float, language: str, exclude: List[str]) -> Optional[str]:
+        # Most informative unused question at `theta`: argmax of a^2 P (1 - P)
+        if not self.ids:
+            return None
+        p = 1.0 / (1.0 + np.exp(-self.a * (theta - self.b)))
+        info = self.a * self.a * p * (1.0 - p)
+        info[~self.languages[language]] = -1.0
+        used = [self.slots[qid] for qid in exclude if qid in self.slots]
+        info[used] = -1.0
+        best = int(np.argmax(info))
+        return self.ids[best] if info[best] >= 0 else None
+
+    def metrics(self) -> Dict:
+        return {
+            'loaded': self.loaded,
+            'estimated': len(self.stats),
+            'questions': len(self.ids)
+        }
+
+    def params(self, question_id: str) -> Tuple[float, float]:
+        slot = self.slots[question_id]
+        return float(self.a[slot]), float(self.b[slot])
+
+item_parameters = ItemParameters()
+
+# Ability grid for the posterior, with a standard normal prior
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+THETA_LOG_PRIOR = -0.5 * THETA_GRID ** 2
+
+def theta_to_iq(theta: float) -> int:
+    return max(IQ_MIN, min(IQ_MAX, int(round(100 + 15 * theta))))
+
+class AdaptiveSession:
+    """An adaptive game: questions are chosen one at a time from the estimate.
+
+    The ability posterior is kept on THETA_GRID and updated per answer, so the
+    estimate (EAP) and its standard error are a few vector operations.
+    """
+
+    __slots__ = ('token', 'mode', 'difficulty', 'language', 'question_ids', 'answer_key', 'correct',
+                 'log_posterior', 'theta', 'se', 'started', 'expires', 'graded')
+
+    def __init__(self, language: str, ttl: float):
+        self.token = new_session_token()
+        self.mode = 'adaptive'
+        self.difficulty = 'medium'
+        self.language = language
+        self.question_ids: List[str] = []
+        self.answer_key = bytearray()
+        self.correct: List[bool] = []
+        self.log_posterior = THETA_LOG_PRIOR.copy()
+        self.theta = 0.0
+        self.se = 1.0
+        self.started = time.monotonic()
+        self.expires = self.started + ttl
+        self.graded = False
+
+    @property
+    def finished(self) -> bool:
+        answered = len(self.correct)
+        return answered >= ADAPTIVE_MAX_QUESTIONS or (answered >= ADAPTIVE_MIN_QUESTIONS and self.se <= ADAPTIVE_TARGET_SE)
+
+    def ask_next(self) -> Optional[Dict]:
+        question_id = item_parameters.next_item(self.theta, self.language, self.question_ids)
+        if question_id is None:
+            return None
+        self.question_ids.append(question_id)
+        self.answer_key.append(question_bank.answer_keys.lookup([question_id], self.language)[0])
+        return question_bank.records[question_id][self.language]
+
+    def answer(self, answer: int) -> bool:
+        index = len(self.correct)
+        correct = answer == self.answer_key[index]
+        self.correct.append(correct)
+        a, b = item_parameters.params(self.question_ids[index])
+        p = 1.0 / (1.0 + np.exp(-a * (THETA_GRID - b)))
+        self.log_posterior += np.log(p if correct else 1.0 - p)
+        weights = np.exp(self.log_posterior - self.log_posterior.max())
+        weights /= weights.sum()
+        self.theta = float(weights @ THETA_GRID)
+        self.se = float(np.sqrt(weights @ (THETA_GRID - self.theta) ** 2))
+        self.difficulty = 'easy' if self.theta < -0.5 else 'hard' if self.theta > 0.5 else 'medium'
+        return correct
+
+    def result(self) -> Dict:
+        correct = sum(self.correct)
+        return {
+            'correct_answers': correct,
+            'total_questions': len(self.correct),
+            'score': correct * SCORE_POINTS.get(self.difficulty, 0),
+            'difficulty': self.difficulty,
+            'time_bonus': 0,
+            'estimated_iq': theta_to_iq(self.theta),
+            'theta': round(self.theta, 3),
+            'se': round(self.se, 3),
+            'results': list(self.correct),
+            'responses': {'question_ids': self.question_ids[:len(self.correct)], 'correct': list(self.correct)}
+        }
+
+@api_router.post("/adaptive/sessions")
+async def create_adaptive_session(request: AdaptiveSessionCreate):
+    if not question_bank.loaded:
+        raise HTTPException(status_code=503, detail="Question bank is not loaded yet")
+    language = request.language if request.language in LANGUAGES else 'en'
+    session = AdaptiveSession(language, game_sessions.ttl)
+    question = session.ask_next()
+    if question is None:
+        raise HTTPException(status_code=404, detail="No questions available")
+    game_sessions.add(session)
+    return {
+        'session_token': session.token,
+        'max_questions': ADAPTIVE_MAX_QUESTIONS,
+        'index': 0,
+        'question': question
+    }
+
+@api_router.post("/adaptive/sessions/{token}/answers")
+async def answer_adaptive_question(token: str, answer: AdaptiveAnswer):
+    # Answers the pending question and returns the next one (None once finished)
+    session = game_sessions.get(token)
+    if session is None:
+        raise game_sessions.not_found(token)
+    if not isinstance(session, AdaptiveSession):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    if len(session.correct) >= len(session.question_ids):
+        raise HTTPException(status_code=409, detail="Game is finished")
+    
+    index = len(session.correct)
+    correct = session.answer(answer.answer)
+    game_sessions.stats['answers'] += 1
+    question = None if session.finished else session.ask_next()
+    return {
+        'index': index,
+        'correct': correct,
+        'correct_answer': session.answer_key[index],
+        'theta': round(session.theta, 3),
+        'se': round(session.se, 3),
+        'estimated_iq': theta_to_iq(session.theta),
+        'finished': question is None,
+        'next': {'index': index + 1, 'question': question} if question else None
+    }
 
 # Score endpoints
 @api_router.post("/scores")
 async def submit_score(score_data: ScoreCreate):
-    estimated_iq = calculate_iq(
-        score_data.correct_answers,
-        score_data.total_questions,
-        score_data.difficulty
-    )
+    score_dict = score_data.dict(exclude={'session_token'})
+    time_bonus = 0
+    if score_data.session_token:
+        # Graded from the session's recorded answers; client counts are ignored
+        session = game_sessions.get(score_data.session_token)
+        if session is None:
+            raise game_sessions.not_found(score_data.session_token)
+        # Daily and adaptive games are scored at the difficulty the session sets
+        if session.mode != score_data.mode or (session.mode not in ('daily', 'adaptive') and session.difficulty != score_data.difficulty):
+            raise HTTPException(status_code=422, detail="Score does not match the session")
+        game_sessions.pop(score_data.session_token)
+        result = session.result()
+        for field in ('score', 'correct_answers', 'total_questions', 'difficulty', 'responses'):
+            score_dict[field] = result[field]
+        time_bonus = result['time_bonus']
+        estimated_iq = result['estimated_iq']
+    elif REQUIRE_SCORE_SESSION:
+        raise HTTPException(status_code=422, detail="session_token is required")
+    else:
+        estimated_iq = calculate_iq(
+            score_dict['correct_answers'],
+            score_dict['total_questions'],
+            score_dict['difficulty'],
+            time_bonus
+        )
     
-    score_dict = score_data.dict()
     score_dict['id'] = str(uuid.uuid4())
     score_dict['estimated_iq'] = estimated_iq
-    score_dict['created_at'] = datetime.utcnow()
+    score_dict['time_bonus'] = time_bonus
+    score_dict['verified'] = score_data.session_token is not None
+    # MongoDB keeps milliseconds; rounding here keeps in-memory copies identical to stored ones
+    now = datetime.utcnow()
+    score_dict['created_at'] = now.replace(microsecond=now.microsecond // 1000 * 1000)
     
-    await db.scores.insert_one(score_dict)
+    if SCORE_WRITE_BEHIND:
+        await score_writer.submit(score_dict)
+    else:
+        await db.scores.insert_one(score_dict)
+    changed = leaderboards.record(score_dict)
+    if changed is None:
+        changed = [(window, mode, difficulty) for window in LEADERBOARD_WINDOWS
+                   for mode, difficulty in Leaderboards.board_keys(score_dict['mode'], score_dict['difficulty'])]
+    leaderboard_streams.notify(changed)
+    if score_histograms.record(score_dict):
+        score_feed.mark(score_dict['id'])
     
     return {
         "id": score_dict['id'],
         "estimated_iq": estimated_iq,
+        "score": score_dict['score'],
+        "correct_answers": score_dict['correct_answers'],
         "message": "Score submitted"
     }
 
@@ -423,113 +2056,704 @@ async def submit_score(score_data: ScoreCreate):
 async def get_leaderboard(
     mode: Optional[str] = None,
     difficulty: Optional[str] = None,
-    limit: int = 20
+    limit: int = 20,
+    window: str = 'all'
 ):
+    if window not in LEADERBOARD_WINDOWS:
+        raise HTTPException(status_code=422, detail=f"window must be one of {LEADERBOARD_WINDOWS}")
+    
     query = {}
     if mode:
         query['mode'] = mode
     if difficulty:
         query['difficulty'] = difficulty
+    start = window_start(window, datetime.utcnow())
+    if start:
+        query['created_at'] = {'$gte': start}
     
-    scores = await db.scores.find(query).sort('estimated_iq', -1).to_list(limit)
+    scores = leaderboards.top(window, mode or None, difficulty or None, limit)
+    if scores is None:
+        scores = await db.scores.find(query).sort('estimated_iq', -1).to_list(limit)
     
-    return [{
-        'rank': i + 1,
-        'user_name': s['user_name'],
-        'score': s['score'],
-        'estimated_iq': s['estimated_iq'],
-        'difficulty': s['difficulty'],
-        'mode': s['mode'],
-        'date': s['created_at'].strftime('%Y-%m-%d') if s.get('created_at') else ''
-    } for i, s in enumerate(scores)]
+    return format_leaderboard(scores)
 
-# Daily Challenge endpoints
-@api_router.get("/daily-challenge")
-async def get_daily_challenge(language: str = 'en'):
-    today = date.today().isoformat()
+# Live leaderboard push (server-sent events)
+def sse_frame(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode('utf-8')
+
+class LeaderboardChannel:
+    """Subscribers of one (window, mode, difficulty) board.
+
+    A single broadcaster task recomputes the rows when the board changes and
+    sends every subscriber the same encoded diff, so open screens cost one
+    computation per change rather than one query per poll.
+    """
+
+    QUEUE_SIZE = 8
+
+    def __init__(self, streams, key: tuple):
+        self.streams = streams
+        self.key = key
+        self.rows: Optional[List[Dict]] = None
+        self.subscribers: List[asyncio.Queue] = []
+        self.changed = asyncio.Event()
+        self.ready = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    async def compute(self) -> List[Dict]:
+        window, mode, difficulty = self.key
+        self.streams.stats['computations'] += 1
+        return await get_leaderboard(mode=mode, difficulty=difficulty, limit=LEADERBOARD_STREAM_SIZE, window=window)
+
+    async def run(self):
+        while True:
+            try:
+                rows = await self.compute()
+            except Exception as e:
+                logger.error(f"Leaderboard stream {self.key} failed: {str(e)}")
+            else:
+                self.publish(rows)
+            self.ready.set()
+            try:
+                await asyncio.wait_for(self.changed.wait(), LEADERBOARD_STREAM_REFRESH_SECONDS)
+                # Let a burst of scores settle into a single update
+                await asyncio.sleep(LEADERBOARD_STREAM_COALESCE_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self.changed.clear()
+
+    def publish(self, rows: List[Dict]):
+        previous, self.rows = self.rows, rows
+        if previous is None:
+            return
+        changed = [row for i, row in enumerate(rows) if i >= len(previous) or previous[i] != row]
+        if not changed and len(rows) == len(previous):
+            return
+        frame = sse_frame('diff', {'changed': changed, 'size': len(rows)})
+        for queue in self.subscribers:
+            self.deliver(queue, frame)
+
+    def deliver(self, queue: asyncio.Queue, frame: bytes):
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # A client that fell behind gets the current state instead of the backlog
+            self.streams.stats['resyncs'] += 1
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.snapshot())
+            return
+        self.streams.stats['events'] += 1
+
+    def snapshot(self) -> bytes:
+        return sse_frame('snapshot', {'rows': self.rows or []})
+
+class LeaderboardStreams:
+    def __init__(self):
+        self.channels: Dict[tuple, LeaderboardChannel] = {}
+        self.stats = {'computations': 0, 'events': 0, 'resyncs': 0}
+
+    async def subscribe(self, key: tuple) -> Tuple[LeaderboardChannel, asyncio.Queue]:
+        channel = self.channels.get(key)
+        if channel is None:
+            channel = self.channels[key] = LeaderboardChannel(self, key)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=LeaderboardChannel.QUEUE_SIZE)
+        channel.subscribers.append(queue)
+        await channel.ready.wait()
+        queue.put_nowait(channel.snapshot())
+        return channel, queue
+
+    def unsubscribe(self, channel: LeaderboardChannel, queue: asyncio.Queue):
+        if queue in channel.subscribers:
+            channel.subscribers.remove(queue)
+        if not channel.subscribers and self.channels.get(channel.key) is channel:
+            del self.channels[channel.key]
+            channel.task.cancel()
+
+    def notify(self, keys: List[tuple]):
+        for key in keys:
+            channel = self.channels.get(key)
+            if channel is not None:
+                channel.changed.set()
+
+    def close(self):
+        for channel in self.channels.values():
+            channel.task.cancel()
+        self.channels.clear()
+
+    def metrics(self) -> Dict:
+        return {
+            'channels': len(self.channels),
+            'subscribers': sum(len(c.subscribers) for c in self.channels.values()),
+            **self.stats
+        }
+
+leaderboard_streams = LeaderboardStreams()
+
+@api_router.get("/scores/leaderboard/stream")
+async def stream_leaderboard(
+    request: Request,
+    mode: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    window: str = 'all'
+):
+    # Sends a snapshot event, then diff events ({changed: rows, size}) as the top N changes
+    if window not in LEADERBOARD_WINDOWS:
+        raise HTTPException(status_code=422, detail=f"window must be one of {LEADERBOARD_WINDOWS}")
+    if mode and mode not in MODES:
+        raise HTTPException(status_code=422, detail=f"mode must be one of {MODES}")
+    if difficulty and difficulty not in DIFFICULTIES:
+        raise HTTPException(status_code=422, detail=f"difficulty must be one of {DIFFICULTIES}")
     
-    # Check if challenge exists for today
-    challenge = await db.daily_challenges.find_one({'date': today})
+    channel, queue = await leaderboard_streams.subscribe((window, mode or None, difficulty or None))
     
-    if not challenge:
-        # Create new daily challenge
-        all_questions = await db.questions.find().to_list(100)
-        if len(all_questions) < 10:
-            raise HTTPException(status_code=404, detail="Not enough questions in database")
-        
-        random.shuffle(all_questions)
-        selected = all_questions[:10]
-        question_ids = [q['id'] for q in selected]
-        
-        challenge = {
-            'id': str(uuid.uuid4()),
-            'date': today,
-            'question_ids': question_ids,
-            'completions': 0
-        }
-        await db.daily_challenges.insert_one(challenge)
-    
-    # Get questions for challenge
-    questions = await db.questions.find({'id': {'$in': challenge['question_ids']}}).to_list(10)
-    
-    result = []
-    for q in questions:
-        trans = q.get('translations', {}).get(language, q.get('translations', {}).get('en', {}))
-        result.append({
-            'id': q['id'],
-            'category': q['category'],
-            'difficulty': q['difficulty'],
-            'question': trans.get('question', ''),
-            'options': trans.get('options', []),
-            'correct_answer': trans.get('correct_answer', 0)
-        })
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), LEADERBOARD_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            leaderboard_streams.unsubscribe(channel, queue)
     
+    return StreamingResponse(events(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@api_router.get("/scores/rank")
+async def get_score_rank(
+    estimated_iq: int,
+    mode: Optional[str] = None,
+    difficulty: Optional[str] = None
+):
+    # rank counts strictly higher scores; percentile is the share strictly lower
+    result = score_histograms.rank(mode or None, difficulty or None, estimated_iq)
+    if result is None:
+        query = {}
+        if mode:
+            query['mode'] = mode
+        if difficulty:
+            query['difficulty'] = difficulty
+        above = await db.scores.count_documents({**query, 'estimated_iq': {'$gt': estimated_iq}})
+        below = await db.scores.count_documents({**query, 'estimated_iq': {'$lt': estimated_iq}})
+        total = await db.scores.count_documents(query)
+        result = build_rank(above, below, total)
     return {
-        'date': today,
-        'completions': challenge.get('completions', 0),
-        'questions': result
+        'estimated_iq': estimated_iq,
+        'mode': mode,
+        'difficulty': difficulty,
+        **result
     }
 
-@api_router.post("/daily-challenge/complete")
-async def complete_daily_challenge():
+# Daily Challenge endpoints
+async def recent_daily_question_ids(day: str) -> set:
+    # Questions used by challenges within the repeat window on either side,
+    # which includes challenges the scheduler has already built ahead
+    center = date.fromisoformat(day)
+    start = (center - timedelta(days=DAILY_REPEAT_WINDOW_DAYS)).isoformat()
+    end = (center + timedelta(days=DAILY_REPEAT_WINDOW_DAYS)).isoformat()
+    recent = set()
+    async for challenge in db.daily_challenges.find(
+        {'date': {'$gte': start, '$lte': end, '$ne': day}}, {'_id': 0, 'question_ids': 1}
+    ):
+        recent.update(challenge.get('question_ids', []))
+    return recent
+
+def stratified_pick(strata: Dict[tuple, List[str]], mix: Dict[str, int], exclude: set) -> List[str]:
+    """Pick ids per difficulty quota, spreading each quota round-robin over categories.
+
+    Shortfalls are filled from any stratum, and only as a last resort from
+    excluded (recently used) ids. Runs in O(total candidates).
+    """
+    fresh = {key: [qid for qid in ids if qid not in exclude] for key, ids in strata.items()}
+    picked: List[str] = []
+    taken = set()
+
+    def draw(pools: Dict[tuple, List[str]], keys: List[tuple], count: int):
+        keys = keys[:]
+        random.shuffle(keys)
+        while count > 0 and keys:
+            for key in keys[:]:
+                pool = pools[key]
+                while pool and pool[-1] in taken:
+                    pool.pop()
+                if not pool:
+                    keys.remove(key)
+                    continue
+                qid = pool.pop()
+                picked.append(qid)
+                taken.add(qid)
+                count -= 1
+                if count == 0:
+                    break
+
+    for difficulty, quota in mix.items():
+        draw(fresh, [key for key in fresh if key[0] == difficulty], quota)
+    size = sum(mix.values())
+    if len(picked) < size:
+        draw(fresh, list(fresh), size - len(picked))
+    if len(picked) < size:
+        stale = {key: [qid for qid in ids if qid in exclude] for key, ids in strata.items()}
+        draw(stale, list(stale), size - len(picked))
+    return picked
+
+async def select_daily_question_ids(day: str) -> List[str]:
+    size = sum(DAILY_CHALLENGE_MIX.values())
+    recent = await recent_daily_question_ids(day)
+    if question_bank.loaded:
+        # Enough per stratum to cover its quota even if every recent id is in it
+        strata = question_bank.sample_strata(size + len(recent))
+    else:
+        # One bounded $sample over the non-recent part of the bank, then stratify
+        strata = {}
+        pipeline = [
+            {'$match': {
+                'id': {'$nin': list(recent)},
+                'category': {'$ne': AI_QUESTION_CATEGORY},
+                'translations.en': {'$exists': True}
+            }},
+            {'$sample': {'size': DAILY_SAMPLE_POOL}},
+            {'$project': {'_id': 0, 'id': 1, 'difficulty': 1, 'category': 1}}
+        ]
+        async for q in db.questions.aggregate(pipeline):
+            strata.setdefault((q.get('difficulty'), q.get('category')), []).append(q['id'])
+        if sum(len(ids) for ids in strata.values()) < size:
+            # Small bank: allow repeats rather than failing
+            async for q in db.questions.aggregate([
+                {'$match': {'category': {'$ne': AI_QUESTION_CATEGORY}, 'translations.en': {'$exists': True}}},
+                {'$sample': {'size': DAILY_SAMPLE_POOL}},
+                {'$project': {'_id': 0, 'id': 1, 'difficulty': 1, 'category': 1}}
+            ]):
+                ids = strata.setdefault((q.get('difficulty'), q.get('category')), [])
+                if q['id'] not in ids:
+                    ids.append(q['id'])
+    question_ids = stratified_pick(strata, DAILY_CHALLENGE_MIX, recent)
+    if len(question_ids) < size:
+        raise HTTPException(status_code=404, detail="Not enough questions in database")
+    return question_ids
+
+async def snapshot_questions(question_ids: List[str]) -> List[Dict]:
+    # Full question content in challenge order, so the challenge renders from one document
+    questions = await db.questions.find(
+        {'id': {'$in': question_ids}},
+        {'_id': 0, 'id': 1, 'category': 1, 'difficulty': 1, 'translations': 1}
+    ).to_list(len(question_ids))
+    by_id = {q['id']: q for q in questions}
+    return [by_id[qid] for qid in question_ids if qid in by_id]
+
+async def create_daily_challenge(day: str) -> Dict:
+    question_ids = await select_daily_question_ids(day)
+    candidate = {
+        'id': str(uuid.uuid4()),
+        'question_ids': question_ids,
+        'questions': await snapshot_questions(question_ids),
+        'completions': 0
+    }
+    # The unique date index makes the upsert the single point of agreement
+    # between workers: whichever insert lands first is the day's challenge
+    try:
+        return await db.daily_challenges.find_one_and_update(
+            {'date': day},
+            {'$setOnInsert': candidate},
+            projection={'_id': 0},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        return await db.daily_challenges.find_one({'date': day}, {'_id': 0})
+
+# In-flight challenge builds, so concurrent requests in a worker share one
+daily_challenge_builds: Dict[str, asyncio.Future] = {}
+
+async def ensure_daily_challenge(day: str) -> Dict:
+    challenge = await db.daily_challenges.find_one({'date': day}, {'_id': 0})
+    if challenge:
+        return challenge
+    build = daily_challenge_builds.get(day)
+    if build is None:
+        build = asyncio.ensure_future(create_daily_challenge(day))
+        daily_challenge_builds[day] = build
+        build.add_done_callback(lambda _: daily_challenge_builds.pop(day, None))
+    # Shield so one cancelled request does not cancel the build for everyone
+    return await asyncio.shield(build)
+
+# Rendered challenges by date: {'challenge': doc, 'questions': {lang: [payload]}}
+daily_challenge_cache: Dict[str, Dict] = {}
+
+async def render_daily_questions(challenge: Dict) -> Dict[str, List[Dict]]:
+    snapshot = challenge.get('questions')
+    if not snapshot:
+        # Challenge created before snapshots were stored: hydrate once and backfill
+        snapshot = await snapshot_questions(challenge['question_ids'])
+        await db.daily_challenges.update_one(
+            {'date': challenge['date'], 'questions': {'$exists': False}},
+            {'$set': {'questions': snapshot}}
+        )
+    return {lang: [format_question(q, lang) for q in snapshot] for lang in LANGUAGES}
+
+# Serialized responses by (date, language): (body, etag). The body leaves out
+# the completions counter so it stays byte-identical for the whole day
+daily_response_cache: Dict[tuple, Tuple[bytes, str]] = {}
+
+def render_daily_response(day: str, questions: List[Dict]) -> Tuple[bytes, str]:
+    body = json.dumps(
+        {'date': day, 'questions': questions}, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+async def prepare_daily_challenge(day: str) -> Dict:
+    challenge = await ensure_daily_challenge(day)
+    entry = {'challenge': challenge, 'questions': await render_daily_questions(challenge)}
+    for lang, questions in entry['questions'].items():
+        if not EXPOSE_ANSWER_KEYS:
+            questions, _ = split_answer_keys(questions)
+        daily_response_cache[(day, lang)] = render_daily_response(day, questions)
+    daily_challenge_cache[day] = entry
+    return entry
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    return '*' in candidates or etag in [tag[2:] if tag.startswith('W/') else tag for tag in candidates]
+
+def daily_cache_control() -> str:
+    # The URL has no date in it, so shared caches must not keep it past midnight
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    max_age = max(0, min(DAILY_CACHE_MAX_AGE, int((midnight - now).total_seconds())))
+    return f"public, max-age={max_age}"
+
+async def daily_challenge_scheduler(days_ahead: int, interval: float):
+    # Keeps today's and the next `days_ahead` challenges built and rendered,
+    # so requests after midnight never trigger selection work
+    while True:
+        today = date.today()
+        for past_day in [d for d in daily_challenge_cache if d < today.isoformat()]:
+            del daily_challenge_cache[past_day]
+        for key in [k for k in daily_response_cache if k[0] < today.isoformat()]:
+            del daily_response_cache[key]
+        for offset in range(days_ahead + 1):
+            day = (today + timedelta(days=offset)).isoformat()
+            if day in daily_challenge_cache:
+                continue
+            try:
+                await prepare_daily_challenge(day)
+            except Exception as e:
+                logger.error(f"Could not prepare daily challenge for {day}: {str(e)}")
+        # Wake up at midnight at the latest to roll the window forward
+        tomorrow = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        until_midnight = (tomorrow - datetime.now()).total_seconds()
+        await asyncio.sleep(max(1.0, min(interval, until_midnight + 1)))
+
+class CompletionCounter:
+    """Per-worker daily completion counts, flushed to MongoDB as one $inc per day.
+
+    Reads combine the last persisted value (refreshed at most once per flush
+    interval, so other workers' completions show up) with unflushed deltas.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.unflushed: Dict[str, int] = {}
+        self.persisted: Dict[str, Tuple[int, float]] = {}  # day -> (value, read at)
+        self.stats = {'flushes': 0, 'flushed': 0}
+        self._lock = asyncio.Lock()
+
+    def increment(self, day: str):
+        self.unflushed[day] = self.unflushed.get(day, 0) + 1
+
+    async def flush(self):
+        async with self._lock:
+            pending, self.unflushed = self.unflushed, {}
+            try:
+                for day in list(pending):
+                    n = pending[day]
+                    doc = await db.daily_challenges.find_one_and_update(
+                        {'date': day},
+                        {'$inc': {'completions': n}},
+                        projection={'_id': 0, 'completions': 1},
+                        return_document=ReturnDocument.AFTER
+                    )
+                    del pending[day]
+                    if doc:
+                        self.persisted[day] = (doc.get('completions', 0), time.monotonic())
+                    self.stats['flushes'] += 1
+                    self.stats['flushed'] += n
+            finally:
+                # Days not written (the failed one and any after it) wait for the next flush
+                for day, n in pending.items():
+                    self.unflushed[day] = self.unflushed.get(day, 0) + n
+            today = date.today().isoformat()
+            for day in [d for d in self.persisted if d < today]:
+                del self.persisted[day]
+
+    async def value(self, day: str) -> int:
+        async with self._lock:
+            persisted = self.persisted.get(day)
+            if persisted is None or time.monotonic() - persisted[1] > self.interval:
+                doc = await db.daily_challenges.find_one({'date': day}, {'_id': 0, 'completions': 1})
+                persisted = ((doc or {}).get('completions', 0), time.monotonic())
+                self.persisted[day] = persisted
+            return persisted[0] + self.unflushed.get(day, 0)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Completion flush failed: {str(e)}")
+
+    def metrics(self) -> Dict:
+        return {'unflushed': sum(self.unflushed.values()), **self.stats}
+
+completion_counter = CompletionCounter(DAILY_COMPLETIONS_FLUSH_SECONDS)
+
+@api_router.get("/daily-challenge")
+async def get_daily_challenge(request: Request, language: str = 'en'):
+    today = date.today().isoformat()
+    if language not in LANGUAGES:
+        language = 'en'
+    
+    cached = daily_response_cache.get((today, language))
+    if cached is None:
+        await prepare_daily_challenge(today)
+        cached = daily_response_cache[(today, language)]
+    body, etag = cached
+    
+    headers = {'ETag': etag, 'Cache-Control': daily_cache_control()}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+@api_router.get("/daily-challenge/completions")
+async def get_daily_completions():
+    # Live counter, kept out of the cacheable challenge body
     today = date.today().isoformat()
-    await db.daily_challenges.update_one(
-        {'date': today},
-        {'$inc': {'completions': 1}}
+    completions = await completion_counter.value(today)
+    return Response(
+        content=json.dumps({'date': today, 'completions': completions}),
+        media_type='application/json',
+        headers={'Cache-Control': 'no-store'}
     )
+
+@api_router.post("/daily-challenge/complete")
+async def complete_daily_challenge():
+    completion_counter.increment(date.today().isoformat())
     return {"message": "Challenge completion recorded"}
 
 # AI Question Generation
-@api_router.post("/generate-question")
-async def generate_ai_question(request: AIQuestionRequest):
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        api_key = os.environ.get('EMERGENT_LLM_KEY')
-        if not api_key:
-            raise HTTPException(status_code=500, detail="AI service not configured")
-        
-        language_names = {
-            'tr': 'Turkish',
-            'en': 'English',
-            'de': 'German',
-            'fr': 'French',
-            'es': 'Spanish'
-        }
-        
-        difficulty_desc = {
-            'easy': 'simple and straightforward',
-            'medium': 'moderately challenging',
-            'hard': 'complex and challenging'
+LANGUAGE_NAMES = {
+    'tr': 'Turkish',
+    'en': 'English',
+    'de': 'German',
+    'fr': 'French',
+    'es': 'Spanish'
+}
+
+DIFFICULTY_DESCRIPTIONS = {
+    'easy': 'simple and straightforward',
+    'medium': 'moderately challenging',
+    'hard': 'complex and challenging'
+}
+
+AI_SYSTEM_MESSAGE = "You are an IQ test question generator. Generate creative and unique questions."
+
+class EmergentLLMClient:
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    async def complete(self, prompt: str) -> str:
+        # LlmChat keeps the conversation history, so each question gets its own session
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=f"iq-gen-{uuid.uuid4()}",
+            system_message=AI_SYSTEM_MESSAGE
+        ).with_model("openai", "gpt-4.1-mini")
+        return await chat.send_message(UserMessage(text=prompt))
+
+class StubLLMClient:
+    """Local stand-in for the LLM (AI_LLM_BACKEND=stub) used in development and tests."""
+
+    def __init__(self, latency_ms: float = 0, failure_rate: float = 0, hang_rate: float = 0):
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.calls = 0
+
+    @staticmethod
+    def _question(label: str) -> Dict:
+        a, b = random.randint(2, 500), random.randint(2, 500)
+        answer = a + b
+        options = [answer, answer + 1, answer - 1, answer + 10]
+        random.shuffle(options)
+        return {
+            'question': f"{a} + {b} = ? ({label})",
+            'options': [str(o) for o in options],
+            'correct_answer': options.index(answer)
         }
+
+    async def complete(self, prompt: str) -> str:
+        self.calls += 1
+        n = self.calls
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if random.random() < self.hang_rate:
+            await asyncio.sleep(3600)
+        if random.random() < self.failure_rate:
+            raise RuntimeError("stub LLM failure")
+        batch = re.search(r'Generate (\d+) unique IQ test questions', prompt)
+        if not batch:
+            return "```json\n" + json.dumps(self._question(f"#{n}")) + "\n```"
+        items = []
+        for i in range(int(batch.group(1))):
+            question = self._question(f"#{n}.{i}")
+            items.append({'translations': {lang: question for lang in LANGUAGES}})
+        return "```json\n" + json.dumps(items, indent=2) + "\n```"
+
+class LLMUnavailable(Exception):
+    pass
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failed calls.
+
+    While open, calls are rejected until `reset_seconds` have passed; then a
+    single trial call is let through (half-open) and its outcome closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self._trial = False
+
+    def allow(self) -> bool:
+        if self.state == 'closed':
+            return True
+        if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = 'half_open'
+            self._trial = False
+        if self.state == 'half_open' and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def success(self):
+        self.state = 'closed'
+        self.failures = 0
+
+    def failure(self):
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.threshold:
+            if self.state != 'open':
+                self.opened += 1
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+
+class ResilientLLMClient:
+    """Deadline, retries and circuit breaker around an LLM client."""
+
+    def __init__(self, inner, timeout: float, deadline: float, retries: int, backoff_ms: float,
+                 breaker: CircuitBreaker):
+        self.inner = inner
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff_ms / 1000
+        self.breaker = breaker
+        self.latencies = deque(maxlen=1000)
+        self.stats = {'calls': 0, 'succeeded': 0, 'failed': 0, 'attempts': 0, 'timeouts': 0, 'errors': 0,
+                      'rejected': 0, 'deadline_exceeded': 0}
+
+    async def complete(self, prompt: str, timeout: Optional[float] = None, deadline: Optional[float] = None) -> str:
+        # `timeout` bounds each attempt, `deadline` the whole call
+        self.stats['calls'] += 1
+        if not self.breaker.allow():
+            self.stats['rejected'] += 1
+            raise LLMUnavailable("AI service temporarily unavailable")
+        timeout = timeout or self.timeout
+        ends = time.monotonic() + (deadline or self.deadline)
+        error, attempts = None, 0
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Full jitter keeps retries from many requests from lining up
+                pause = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+                if time.monotonic() + pause >= ends:
+                    self.stats['deadline_exceeded'] += 1
+                    break
+                await asyncio.sleep(pause)
+            attempt_timeout = min(timeout, ends - time.monotonic())
+            attempts += 1
+            self.stats['attempts'] += 1
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(self.inner.complete(prompt), attempt_timeout)
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                error = f"no response within {attempt_timeout:.3g}s"
+            except Exception as e:
+                self.stats['errors'] += 1
+                error = str(e)
+            else:
+                self.latencies.append(time.perf_counter() - started)
+                self.stats['succeeded'] += 1
+                self.breaker.success()
+                return response
+            self.latencies.append(time.perf_counter() - started)
+        self.stats['failed'] += 1
+        self.breaker.failure()
+        raise LLMUnavailable(f"AI service failed after {attempts} attempts: {error}")
+
+    def metrics(self) -> Dict:
+        latencies = sorted(self.latencies)
         
-        lang_name = language_names.get(request.language, 'English')
-        diff_desc = difficulty_desc.get(request.difficulty, 'moderately challenging')
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
         
-        prompt = f"""Generate a unique IQ test question in {lang_name}. The question should be {diff_desc}.
+        finished = self.stats['succeeded'] + self.stats['failed']
+        return {
+            'breaker': self.breaker.state,
+            'breaker_opened': self.breaker.opened,
+            'failure_rate': round(self.stats['failed'] / finished, 4) if finished else 0.0,
+            'latency_ms_p50': percentile(0.5),
+            'latency_ms_p95': percentile(0.95),
+            'latency_ms_max': round(latencies[-1] * 1000, 1) if latencies else None,
+            **self.stats
+        }
+
+def create_llm_client():
+    if AI_LLM_BACKEND == 'stub':
+        inner = StubLLMClient(AI_STUB_LATENCY_MS, AI_STUB_FAILURE_RATE, AI_STUB_HANG_RATE)
+    else:
+        api_key = os.environ.get('EMERGENT_LLM_KEY')
+        if not api_key or LlmChat is None:
+            return None
+        inner = EmergentLLMClient(api_key)
+    breaker = CircuitBreaker(AI_BREAKER_THRESHOLD, AI_BREAKER_RESET_SECONDS)
+    return ResilientLLMClient(inner, AI_LLM_TIMEOUT_SECONDS, AI_LLM_DEADLINE_SECONDS, AI_LLM_RETRIES,
+                              AI_LLM_BACKOFF_MS, breaker)
+
+llm_client = create_llm_client()
+
+def build_question_prompt(language: str, difficulty: str, category: Optional[str]) -> str:
+    lang_name = LANGUAGE_NAMES.get(language, 'English')
+    diff_desc = DIFFICULTY_DESCRIPTIONS.get(difficulty, 'moderately challenging')
+    kind = f"a {category}" if category else "a logic, pattern recognition, or mathematical reasoning"
+    
+    return f"""Generate a unique IQ test question in {lang_name}. The question should be {diff_desc}.
 
 Rules:
-1. Create a logic, pattern recognition, or mathematical reasoning question
+1. Create {kind} question
 2. Provide exactly 4 answer options
 3. Indicate which option (0-3) is correct
 
@@ -541,390 +2765,801 @@ Respond in this exact JSON format:
 }}
 
 Only respond with the JSON, nothing else."""
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"iq-gen-{uuid.uuid4()}",
-            system_message="You are an IQ test question generator. Generate creative and unique questions."
-        ).with_model("openai", "gpt-4.1-mini")
-        
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
-        
-        # Parse response
-        import json
-        # Clean response
-        response_clean = response.strip()
-        if response_clean.startswith('```json'):
-            response_clean = response_clean[7:]
-        if response_clean.startswith('```'):
-            response_clean = response_clean[3:]
-        if response_clean.endswith('```'):
-            response_clean = response_clean[:-3]
-        
-        question_data = json.loads(response_clean.strip())
-        
+
+def build_batch_prompt(count: int, difficulty: str, category: Optional[str]) -> str:
+    diff_desc = DIFFICULTY_DESCRIPTIONS.get(difficulty, 'moderately challenging')
+    kind = f"{category}" if category else "logic, pattern recognition, or mathematical reasoning"
+    languages = ', '.join(f'"{lang}" ({LANGUAGE_NAMES[lang]})' for lang in LANGUAGES)
+    
+    return f"""Generate {count} unique IQ test questions. Each question should be {diff_desc}.
+
+Rules:
+1. Create {kind} questions, all different from each other
+2. Provide exactly 4 answer options
+3. Indicate which option (0-3) is correct; it must be the same option in every language
+4. Translate every question into all of these languages: {languages}
+
+Respond with a JSON array in this exact format:
+[
+  {{
+    "translations": {{
+      "en": {{"question": "Question text", "options": ["A", "B", "C", "D"], "correct_answer": 0}},
+      "tr": {{"question": "...", "options": ["...", "...", "...", "..."], "correct_answer": 0}}
+    }}
+  }}
+]
+
+Only respond with the JSON, nothing else."""
+
+class JSONObjectStream:
+    """Incrementally extracts complete top-level JSON objects from LLM output.
+
+    Code fences, surrounding prose and an enclosing array are skipped. Each
+    object is parsed on its own, so one malformed item does not lose the rest.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List:
+        # Returns parsed objects and ValueErrors for objects that did not parse
+        results = []
+        for ch in chunk:
+            if self._depth == 0:
+                if ch == '{':
+                    self._depth = 1
+                    self._buffer = [ch]
+                continue
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '{':
+                self._depth += 1
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        results.append(json.loads(''.join(self._buffer)))
+                    except ValueError as e:
+                        results.append(e)
+                    self._buffer = []
+        return results
+
+    def close(self) -> List:
+        if self._depth:
+            self._depth = 0
+            return [ValueError("truncated JSON object")]
+        return []
+
+def parse_llm_objects(response: str) -> Tuple[List[Dict], List[str]]:
+    stream = JSONObjectStream()
+    objects, errors = [], []
+    for item in stream.feed(response) + stream.close():
+        if isinstance(item, ValueError):
+            errors.append(str(item))
+        elif isinstance(item.get('questions'), list):
+            # Tolerate {"questions": [...]} wrappers
+            objects.extend(q for q in item['questions'] if isinstance(q, dict))
+        else:
+            objects.append(item)
+    return objects, errors
+
+def validate_ai_question(data) -> Dict:
+    if not isinstance(data, dict):
+        raise ValueError("question must be a JSON object")
+    question, options, answer = data.get('question'), data.get('options'), data.get('correct_answer')
+    if not isinstance(question, str) or not question.strip():
+        raise ValueError("question text is missing")
+    if not isinstance(options, list) or len(options) != 4 or not all(isinstance(o, (str, int, float)) for o in options):
+        raise ValueError("exactly 4 options are required")
+    if isinstance(answer, bool) or not isinstance(answer, int) or not 0 <= answer < 4:
+        raise ValueError("correct_answer must be 0-3")
+    return {'question': question.strip(), 'options': [str(o) for o in options], 'correct_answer': answer}
+
+async def generate_question_live(language: str, difficulty: str, category: Optional[str]) -> Dict:
+    if llm_client is None:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+    response = await llm_client.complete(build_question_prompt(language, difficulty, category))
+    objects, errors = parse_llm_objects(response)
+    if not objects:
+        raise ValueError(errors[0] if errors else "no JSON object in response")
+    question_data = validate_ai_question(objects[0])
+    return {
+        'id': str(uuid.uuid4()),
+        'category': AI_QUESTION_CATEGORY,
+        'difficulty': difficulty,
+        **question_data
+    }
+
+def validate_ai_batch_item(item: Dict) -> Dict[str, Dict]:
+    """Valid translations of one batch item.
+
+    The item is rejected if English is missing or invalid. Any other language
+    that is invalid, or whose correct answer differs from English, is dropped.
+    """
+    translations = item.get('translations')
+    if not isinstance(translations, dict):
+        raise ValueError("translations missing")
+    english = validate_ai_question(translations.get('en'))
+    valid = {'en': english}
+    for lang in LANGUAGES:
+        if lang == 'en' or lang not in translations:
+            continue
+        try:
+            trans = validate_ai_question(translations[lang])
+        except ValueError:
+            continue
+        if trans['correct_answer'] == english['correct_answer']:
+            valid[lang] = trans
+    return valid
+
+class AIBatchStats:
+    """Running throughput and estimated cost of batch generation calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.requested = 0
+        self.valid = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.seconds = 0.0
+        self.prompt_chars = 0
+        self.response_chars = 0
+
+    @staticmethod
+    def estimate(prompt_chars: int, response_chars: int, seconds: float, valid: int) -> Dict:
+        # Roughly four characters per token
+        input_tokens, output_tokens = prompt_chars / 4, response_chars / 4
+        cost = input_tokens / 1000 * AI_INPUT_COST_PER_1K + output_tokens / 1000 * AI_OUTPUT_COST_PER_1K
         return {
-            'id': str(uuid.uuid4()),
-            'category': 'ai_generated',
-            'difficulty': request.difficulty,
-            'question': question_data['question'],
-            'options': question_data['options'],
-            'correct_answer': question_data['correct_answer']
+            'seconds': round(seconds, 3),
+            'questions_per_second': round(valid / seconds, 2) if seconds else 0.0,
+            'estimated_input_tokens': int(input_tokens),
+            'estimated_output_tokens': int(output_tokens),
+            'estimated_cost_usd': round(cost, 6),
+            'estimated_cost_per_question_usd': round(cost / valid, 6) if valid else None
         }
-        
+
+    def record(self, report: Dict, prompt_chars: int, response_chars: int):
+        self.calls += 1
+        self.requested += report['requested']
+        self.valid += report['valid']
+        self.invalid += report['invalid']
+        self.duplicates += report['duplicates']
+        self.seconds += report['seconds']
+        self.prompt_chars += prompt_chars
+        self.response_chars += response_chars
+
+    def metrics(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'requested': self.requested,
+            'valid': self.valid,
+            'invalid': self.invalid,
+            'duplicates': self.duplicates,
+            **self.estimate(self.prompt_chars, self.response_chars, self.seconds, self.valid)
+        }
+
+ai_batch_stats = AIBatchStats()
+
+async def generate_question_batch(count: int, difficulty: str, category: Optional[str]) -> Tuple[List[Dict], Dict]:
+    """One LLM call for `count` questions in all languages.
+
+    Returns the stored question documents (duplicates and malformed items
+    skipped) and a report for the call.
+    """
+    if llm_client is None:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+    prompt = build_batch_prompt(count, difficulty, category)
+    started = time.perf_counter()
+    response = await llm_client.complete(prompt, AI_BATCH_TIMEOUT_SECONDS, AI_BATCH_DEADLINE_SECONDS)
+    elapsed = time.perf_counter() - started
+    
+    objects, errors = parse_llm_objects(response)
+    questions, duplicates = [], 0
+    for item in objects[:count]:
+        try:
+            translations = validate_ai_batch_item(item)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        q_dict = await store_ai_question(difficulty, translations)
+        if q_dict is None:
+            duplicates += 1
+        else:
+            questions.append(q_dict)
+    
+    report = {
+        'requested': count,
+        'valid': len(questions),
+        'invalid': len(errors),
+        'duplicates': duplicates,
+        'errors': errors[:10],
+        **AIBatchStats.estimate(len(prompt), len(response), elapsed, len(questions))
+    }
+    ai_batch_stats.record(report, len(prompt), len(response))
+    return questions, report
+
+async def store_ai_question(difficulty: str, translations: Dict[str, Dict], question_id: Optional[str] = None) -> Optional[Dict]:
+    # Returns None when an equivalent question (normalized text and options) exists
+    text_hashes = question_text_hashes(translations)
+    if question_bank.loaded:
+        if any(h in question_bank.text_hashes for h in text_hashes):
+            return None
+    elif await db.questions.find_one({'text_hashes': {'$in': text_hashes}}, {'_id': 0, 'id': 1}):
+        return None
+    q_dict = {
+        'id': question_id or str(uuid.uuid4()),
+        'category': AI_QUESTION_CATEGORY,
+        'difficulty': difficulty,
+        'translations': translations,
+        'text_hashes': text_hashes,
+        'created_at': datetime.utcnow()
+    }
+    q_dict['content_hash'] = question_content_hash(q_dict)
+    if not AI_PERSIST_QUESTIONS:
+        return q_dict
+    try:
+        await db.questions.insert_one(q_dict)
+    except DuplicateKeyError:
+        return None
+    question_bank.add([q_dict])
+    return q_dict
+
+async def persist_ai_question(language: str, difficulty: str, question: Dict) -> bool:
+    translations = {language: {
+        'question': question['question'],
+        'options': question['options'],
+        'correct_answer': question['correct_answer']
+    }}
+    return await store_ai_question(difficulty, translations, question['id']) is not None
+
+class AIQuestionPool:
+    """Bounded buffers of ready AI questions per (language, difficulty, category).
+
+    Taking a question (or missing) schedules a background top-up for that key;
+    LLM calls across all keys share a concurrency limit.
+    """
+
+    def __init__(self, size: int, concurrency: int):
+        self.size = size
+        self.buffers: Dict[tuple, deque] = {}
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._filling: Dict[tuple, asyncio.Task] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'generated': 0, 'duplicates': 0, 'failed': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and llm_client is not None
+
+    def take(self, key: tuple) -> Optional[Dict]:
+        buffer = self.buffers.get(key)
+        question = buffer.popleft() if buffer else None
+        self.stats['hits' if question else 'misses'] += 1
+        self.top_up(key)
+        return question
+
+    def top_up(self, key: tuple):
+        if key not in self._filling:
+            self._filling[key] = asyncio.create_task(self._fill(key))
+
+    async def _fill(self, key: tuple):
+        buffer = self.buffers.setdefault(key, deque(maxlen=self.size))
+        failures = 0
+        try:
+            # Give up after a few consecutive failures; the next take() retries
+            while len(buffer) < self.size and failures < 3:
+                if AI_BATCH_SIZE > 1:
+                    if await self._fill_batch(key):
+                        failures = 0
+                    else:
+                        failures += 1
+                    continue
+                async with self._semaphore:
+                    try:
+                        question = await generate_question_live(*key)
+                    except Exception as e:
+                        failures += 1
+                        self.stats['failed'] += 1
+                        logger.error(f"AI pool generation failed for {key}: {str(e)}")
+                        continue
+                self.stats['generated'] += 1
+                if AI_PERSIST_QUESTIONS and not await persist_ai_question(key[0], key[1], question):
+                    # Repeats cost a call but are not worth buffering
+                    failures += 1
+                    self.stats['duplicates'] += 1
+                    continue
+                failures = 0
+                buffer.append(question)
+        finally:
+            self._filling.pop(key, None)
+
+    async def _fill_batch(self, key: tuple) -> bool:
+        # One call yields every language, so sibling buffers are filled as well.
+        # Only growth of `key`'s own buffer counts as progress, so a language
+        # whose translations keep failing validation still runs out of attempts
+        _, difficulty, category = key
+        filled = len(self.buffers[key])
+        async with self._semaphore:
+            try:
+                questions, report = await generate_question_batch(AI_BATCH_SIZE, difficulty, category)
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"AI pool batch generation failed for {key}: {str(e)}")
+                return False
+        self.stats['generated'] += report['valid'] + report['duplicates']
+        self.stats['duplicates'] += report['duplicates']
+        self.stats['failed'] += report['invalid']
+        for q_dict in questions:
+            for lang in q_dict['translations']:
+                buffer = self.buffers.setdefault((lang, difficulty, category), deque(maxlen=self.size))
+                if len(buffer) < self.size:
+                    buffer.append(format_question(q_dict, lang))
+        return len(self.buffers[key]) > filled
+
+    def prefill(self):
+        for language in LANGUAGES:
+            for difficulty in DIFFICULTIES:
+                self.top_up((language, difficulty, None))
+
+    def close(self):
+        for task in self._filling.values():
+            task.cancel()
+
+    def metrics(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'buffered': sum(len(b) for b in self.buffers.values()),
+            'keys': len(self.buffers),
+            'filling': len(self._filling),
+            **self.stats
+        }
+
+ai_pool = AIQuestionPool(AI_POOL_SIZE, AI_POOL_CONCURRENCY)
+
+ai_fallbacks = {'served': 0, 'empty': 0}
+
+def stored_ai_fallback(language: str, difficulty: str) -> Optional[Dict]:
+    # Previously generated questions stand in while the provider is unhealthy.
+    # Only those: they carry their answer like a live AI question, and the
+    # keys of regular bank questions must stay on the server
+    questions = question_bank.sample(difficulty, AI_QUESTION_CATEGORY, language, 1)
+    if questions:
+        ai_fallbacks['served'] += 1
+        return with_answer_keys(questions, question_bank.answer_keys.lookup([questions[0]['id']], language))[0]
+    ai_fallbacks['empty'] += 1
+    return None
+
+@api_router.post("/generate-question")
+async def generate_ai_question(request: AIQuestionRequest):
+    language = request.language if request.language in LANGUAGES else 'en'
+    difficulty = request.difficulty if request.difficulty in DIFFICULTIES else 'medium'
+    category = request.category or None
+    
+    # Only pool well-known keys so arbitrary input cannot create buffers
+    if ai_pool.enabled and (category is None or category in CATEGORIES):
+        question = ai_pool.take((language, difficulty, category))
+        if question:
+            return question
+    
+    try:
+        question = await generate_question_live(language, difficulty, category)
+        if AI_PERSIST_QUESTIONS:
+            await persist_ai_question(language, difficulty, question)
+        return question
+    except LLMUnavailable as e:
+        logging.error(f"AI generation error: {str(e)}")
+        question = stored_ai_fallback(language, difficulty)
+        if question:
+            return question
+        raise HTTPException(status_code=503, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"AI generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate question: {str(e)}")
 
+@api_router.post("/generate-questions/batch")
+async def generate_ai_question_batch(request: AIBatchRequest):
+    difficulty = request.difficulty if request.difficulty in DIFFICULTIES else 'medium'
+    count = max(1, min(request.count, AI_BATCH_MAX))
+    try:
+        questions, report = await generate_question_batch(count, difficulty, request.category or None)
+    except HTTPException:
+        raise
+    except LLMUnavailable as e:
+        logging.error(f"AI batch generation error: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logging.error(f"AI batch generation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate questions: {str(e)}")
+    return {
+        'questions': [{'id': q['id'], 'languages': sorted(q['translations'])} for q in questions],
+        'report': report
+    }
+
+# Multiplayer rooms over WebSockets
+class PlayerConnection:
+    """One multiplayer client.
+
+    Frames are queued in a bounded outbox drained by a sender task, so a slow
+    reader holds at most `outbox_size` frames before it is disconnected.
+    """
+
+    __slots__ = ('id', 'name', 'key', 'room', 'joined_at', 'closed', 'outbox', 'sender', '_send', '_close')
+    slow_disconnects = 0
+
+    def __init__(self, send, close, outbox_size: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = ''
+        self.key: Optional[tuple] = None
+        self.room = None
+        self.joined_at = 0.0
+        self.closed = False
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=outbox_size)
+        self._send = send
+        self._close = close
+        self.sender = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        try:
+            while True:
+                await self._send(await self.outbox.get())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.closed = True
+
+    def push(self, frame: str) -> bool:
+        if self.closed:
+            return False
+        try:
+            self.outbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            PlayerConnection.slow_disconnects += 1
+            self.close(1013)
+            return False
+        return True
+
+    def send(self, message: Dict) -> bool:
+        return self.push(json.dumps(message))
+
+    def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        self.sender.cancel()
+        asyncio.ensure_future(self._close_quietly(code))
+
+    async def _close_quietly(self, code: int):
+        try:
+            await self._close(code)
+        except Exception:
+            pass
+
+class MultiplayerRoom:
+    """A group of players answering the same questions round by round."""
+
+    __slots__ = ('id', 'key', 'manager', 'players', 'questions', 'scores', 'correct',
+                 'round', 'round_started', 'answers', 'all_answered', 'task')
+
+    def __init__(self, manager, key: tuple, players: List[PlayerConnection], questions: List[Dict]):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.manager = manager
+        self.players = players
+        self.questions = questions
+        self.scores = {p.id: 0 for p in players}
+        self.correct = {p.id: 0 for p in players}
+        self.round = -1
+        self.round_started = 0.0
+        self.answers: Dict[str, Tuple[int, float]] = {}
+        self.all_answered = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def active(self) -> List[PlayerConnection]:
+        return [p for p in self.players if not p.closed and p.room is self]
+
+    def broadcast(self, message: Dict):
+        # Serialized once; every outbox holds a reference to the same string
+        frame = json.dumps(message)
+        for player in self.active():
+            player.push(frame)
+
+    def answer(self, player: PlayerConnection, round_index, answer):
+        if round_index != self.round or player.id in self.answers:
+            return
+        options = self.questions[self.round]['options']
+        if isinstance(answer, bool) or not isinstance(answer, int) or not 0 <= answer < len(options):
+            player.send({'type': 'error', 'detail': 'invalid answer'})
+            return
+        self.answers[player.id] = (answer, time.monotonic() - self.round_started)
+        self.check_round()
+
+    def check_round(self):
+        if all(p.id in self.answers for p in self.active()):
+            self.all_answered.set()
+
+    def standings(self) -> List[Dict]:
+        ranked = sorted(self.players, key=lambda p: -self.scores[p.id])
+        return [
+            {'id': p.id, 'name': p.name, 'score': self.scores[p.id], 'correct': self.correct[p.id], 'left': p.room is not self}
+            for p in ranked
+        ]
+
+    async def run(self):
+        manager = self.manager
+        self.broadcast({
+            'type': 'start',
+            'room': self.id,
+            'players': [{'id': p.id, 'name': p.name} for p in self.players],
+            'rounds': len(self.questions),
+            'round_seconds': manager.round_seconds
+        })
+        for index, question in enumerate(self.questions):
+            self.round = index
+            self.answers = {}
+            self.all_answered.clear()
+            self.round_started = time.monotonic()
+            self.broadcast({
+                'type': 'question',
+                'round': index,
+                'question': {k: question[k] for k in ('id', 'category', 'difficulty', 'question', 'options')},
+                'seconds': manager.round_seconds
+            })
+            try:
+                await asyncio.wait_for(self.all_answered.wait(), manager.round_seconds)
+            except asyncio.TimeoutError:
+                pass
+            
+            results = {}
+            for player in self.players:
+                answer, elapsed = self.answers.get(player.id, (None, None))
+                is_correct = answer == question['correct_answer']
+                if is_correct:
+                    # Correct answers earn 100 points plus up to 100 for speed
+                    self.scores[player.id] += 100 + int(100 * max(0.0, 1 - elapsed / manager.round_seconds))
+                    self.correct[player.id] += 1
+                results[player.id] = {'answer': answer, 'correct': is_correct}
+            self.round = -1
+            self.broadcast({
+                'type': 'round_result',
+                'round': index,
+                'correct_answer': question['correct_answer'],
+                'results': results,
+                'standings': self.standings()
+            })
+            if not self.active():
+                break
+            if index < len(self.questions) - 1 and manager.result_pause:
+                await asyncio.sleep(manager.result_pause)
+        
+        self.broadcast({'type': 'game_over', 'room': self.id, 'rounds': len(self.questions), 'standings': self.standings()})
+        for player in self.active():
+            player.room = None
+
+class RoomManager:
+    """Matchmaking queues per (language, difficulty) and the running rooms.
+
+    A room starts as soon as a queue holds `room_size` players, or with at
+    least `min_players` once the oldest has waited `match_wait` seconds.
+    """
+
+    def __init__(self, question_source, room_size: int, min_players: int, match_wait: float,
+                 questions: int, round_seconds: float, result_pause: float):
+        self.question_source = question_source
+        self.room_size = room_size
+        self.min_players = min(min_players, room_size)
+        self.match_wait = match_wait
+        self.questions = questions
+        self.round_seconds = round_seconds
+        self.result_pause = result_pause
+        self.queues: Dict[tuple, deque] = {}
+        self.rooms: Dict[str, MultiplayerRoom] = {}
+        self.stats = {'rooms_started': 0, 'rooms_finished': 0, 'rooms_failed': 0, 'players_matched': 0}
+
+    async def handle(self, player: PlayerConnection, message: Dict):
+        kind = message.get('type')
+        if kind == 'join':
+            await self.join(player, message.get('language'), message.get('difficulty'), message.get('name'))
+        elif kind == 'answer':
+            if player.room is None:
+                player.send({'type': 'error', 'detail': 'not in a room'})
+            else:
+                player.room.answer(player, message.get('round'), message.get('answer'))
+        elif kind == 'leave':
+            self.leave(player)
+        else:
+            player.send({'type': 'error', 'detail': 'unknown message type'})
+
+    async def join(self, player: PlayerConnection, language, difficulty, name):
+        if player.key is not None or player.room is not None:
+            player.send({'type': 'error', 'detail': 'already queued or playing'})
+            return
+        key = (language if language in LANGUAGES else 'en', difficulty if difficulty in DIFFICULTIES else 'medium')
+        player.name = str(name or '').strip()[:MP_NAME_MAX] or f"Player {player.id[:4]}"
+        player.key = key
+        player.joined_at = time.monotonic()
+        queue = self.queues.setdefault(key, deque())
+        queue.append(player)
+        player.send({'type': 'queued', 'language': key[0], 'difficulty': key[1], 'waiting': len(queue)})
+        if len(queue) >= self.room_size:
+            await self.start_room(key, self.room_size)
+
+    def leave(self, player: PlayerConnection):
+        if player.key is not None:
+            queue = self.queues.get(player.key)
+            if queue is not None and player in queue:
+                queue.remove(player)
+            player.key = None
+        room = player.room
+        if room is not None:
+            player.room = None
+            room.check_round()
+
+    async def start_room(self, key: tuple, count: int):
+        queue = self.queues[key]
+        players = []
+        while queue and len(players) < count:
+            player = queue.popleft()
+            player.key = None
+            if not player.closed:
+                players.append(player)
+        if not queue:
+            del self.queues[key]
+        if not players:
+            return
+        
+        try:
+            questions = await self.question_source(key[0], key[1], self.questions)
+        except Exception as e:
+            logger.error(f"Multiplayer questions unavailable for {key}: {str(e)}")
+            questions = []
+        if not questions:
+            self.stats['rooms_failed'] += 1
+            for player in players:
+                player.send({'type': 'error', 'detail': 'no questions available'})
+            return
+        
+        room = MultiplayerRoom(self, key, players, questions)
+        for player in players:
+            player.room = room
+        self.rooms[room.id] = room
+        self.stats['rooms_started'] += 1
+        self.stats['players_matched'] += len(players)
+        room.task = asyncio.create_task(room.run())
+        room.task.add_done_callback(lambda task, room_id=room.id: self._finished(room_id, task))
+
+    def _finished(self, room_id: str, task: asyncio.Task):
+        self.rooms.pop(room_id, None)
+        if task.cancelled():
+            return
+        if task.exception():
+            logger.error(f"Multiplayer room {room_id} failed: {task.exception()}")
+        else:
+            self.stats['rooms_finished'] += 1
+
+    async def matchmaker(self, interval: float):
+        # Starts smaller rooms for players who have waited long enough
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for key, queue in list(self.queues.items()):
+                while queue and queue[0].closed:
+                    queue.popleft()
+                if len(queue) >= self.min_players and now - queue[0].joined_at >= self.match_wait:
+                    try:
+                        await self.start_room(key, min(len(queue), self.room_size))
+                    except Exception as e:
+                        logger.error(f"Matchmaking failed for {key}: {str(e)}")
+
+    def close(self):
+        for room in list(self.rooms.values()):
+            for player in room.players:
+                player.close(1001)
+            if room.task:
+                room.task.cancel()
+        for queue in self.queues.values():
+            for player in queue:
+                player.close(1001)
+        self.queues.clear()
+
+    def metrics(self) -> Dict:
+        return {
+            'queued': sum(len(q) for q in self.queues.values()),
+            'rooms': len(self.rooms),
+            'players': sum(len(room.active()) for room in self.rooms.values()),
+            'slow_disconnects': PlayerConnection.slow_disconnects,
+            **self.stats
+        }
+
+async def multiplayer_questions(language: str, difficulty: str, count: int) -> List[Dict]:
+    # Rooms grade on the server, so they hold the keys; broadcasts leave them out
+    return with_answer_keys(*await select_questions({'difficulty': difficulty}, language, count))
+
+room_manager = RoomManager(
+    multiplayer_questions, MP_ROOM_SIZE, MP_MIN_PLAYERS, MP_MATCH_WAIT_SECONDS,
+    MP_QUESTIONS, MP_ROUND_SECONDS, MP_RESULT_PAUSE_SECONDS
+)
+
+@api_router.websocket("/ws/multiplayer")
+async def multiplayer_socket(websocket: WebSocket):
+    await websocket.accept()
+    player = PlayerConnection(websocket.send_text, lambda code: websocket.close(code=code), MP_OUTBOX_SIZE)
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            if len(raw) > MP_MAX_MESSAGE_BYTES:
+                player.send({'type': 'error', 'detail': 'message too large'})
+                continue
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                player.send({'type': 'error', 'detail': 'messages must be JSON objects'})
+                continue
+            await room_manager.handle(player, message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        room_manager.leave(player)
+        player.close()
+
 # Initialize sample questions
+@lru_cache(maxsize=1)
+def load_sample_questions() -> Tuple[Dict, ...]:
+    # Read and validated once, on first use
+    with open(SAMPLE_QUESTIONS_PATH, encoding='utf-8') as f:
+        raw = json.load(f)
+    questions = []
+    for item in raw:
+        q_dict = QuestionCreate.model_validate(item).dict()
+        q_dict['content_hash'] = question_content_hash(q_dict)
+        q_dict['text_hashes'] = question_text_hashes(q_dict['translations'])
+        questions.append(q_dict)
+    return tuple(questions)
+
 @api_router.post("/init-questions")
 async def init_sample_questions():
     # Check if questions already exist
-    count = await db.questions.count_documents({})
+    count = await db.questions.estimated_document_count()
     if count > 0:
         return {"message": f"Database already has {count} questions"}
     
-    sample_questions = [
-        # Logic Questions - Easy
-        {
-            "category": "logic",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "Bir çiftçinin 17 koyunu var. 9 tanesi hariç hepsi öldü. Kaç koyun kaldı?", "options": ["8", "9", "17", "0"], "correct_answer": 1},
-                "en": {"question": "A farmer has 17 sheep. All but 9 die. How many sheep are left?", "options": ["8", "9", "17", "0"], "correct_answer": 1},
-                "de": {"question": "Ein Bauer hat 17 Schafe. Alle außer 9 sterben. Wie viele Schafe bleiben übrig?", "options": ["8", "9", "17", "0"], "correct_answer": 1},
-                "fr": {"question": "Un fermier a 17 moutons. Tous sauf 9 meurent. Combien de moutons reste-t-il?", "options": ["8", "9", "17", "0"], "correct_answer": 1},
-                "es": {"question": "Un granjero tiene 17 ovejas. Todas menos 9 mueren. ¿Cuántas ovejas quedan?", "options": ["8", "9", "17", "0"], "correct_answer": 1}
-            }
-        },
-        # Math Questions - Easy
-        {
-            "category": "math",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "12 + 8 × 2 = ?", "options": ["40", "28", "32", "20"], "correct_answer": 1},
-                "en": {"question": "12 + 8 × 2 = ?", "options": ["40", "28", "32", "20"], "correct_answer": 1},
-                "de": {"question": "12 + 8 × 2 = ?", "options": ["40", "28", "32", "20"], "correct_answer": 1},
-                "fr": {"question": "12 + 8 × 2 = ?", "options": ["40", "28", "32", "20"], "correct_answer": 1},
-                "es": {"question": "12 + 8 × 2 = ?", "options": ["40", "28", "32", "20"], "correct_answer": 1}
-            }
-        },
-        # Pattern Questions - Easy
-        {
-            "category": "pattern",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "Sıradaki sayı nedir? 2, 4, 6, 8, ?", "options": ["9", "10", "11", "12"], "correct_answer": 1},
-                "en": {"question": "What is the next number? 2, 4, 6, 8, ?", "options": ["9", "10", "11", "12"], "correct_answer": 1},
-                "de": {"question": "Was ist die nächste Zahl? 2, 4, 6, 8, ?", "options": ["9", "10", "11", "12"], "correct_answer": 1},
-                "fr": {"question": "Quel est le prochain nombre? 2, 4, 6, 8, ?", "options": ["9", "10", "11", "12"], "correct_answer": 1},
-                "es": {"question": "¿Cuál es el siguiente número? 2, 4, 6, 8, ?", "options": ["9", "10", "11", "12"], "correct_answer": 1}
-            }
-        },
-        # Logic Questions - Medium
-        {
-            "category": "logic",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "Bir odada 6 kişi var. Her biri diğerleriyle el sıkışıyor. Toplam kaç el sıkışma olur?", "options": ["30", "15", "12", "6"], "correct_answer": 1},
-                "en": {"question": "There are 6 people in a room. Each one shakes hands with everyone else. How many handshakes occur?", "options": ["30", "15", "12", "6"], "correct_answer": 1},
-                "de": {"question": "In einem Raum sind 6 Personen. Jeder gibt jedem anderen die Hand. Wie viele Händedrücke gibt es?", "options": ["30", "15", "12", "6"], "correct_answer": 1},
-                "fr": {"question": "Il y a 6 personnes dans une pièce. Chacun serre la main de tous les autres. Combien de poignées de main y a-t-il?", "options": ["30", "15", "12", "6"], "correct_answer": 1},
-                "es": {"question": "Hay 6 personas en una habitación. Cada una le da la mano a todas las demás. ¿Cuántos apretones de manos hay?", "options": ["30", "15", "12", "6"], "correct_answer": 1}
-            }
-        },
-        # Math Questions - Medium
-        {
-            "category": "math",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "Bir sayının %25'i 20'dir. Bu sayı kaçtır?", "options": ["5", "80", "100", "45"], "correct_answer": 1},
-                "en": {"question": "25% of a number is 20. What is the number?", "options": ["5", "80", "100", "45"], "correct_answer": 1},
-                "de": {"question": "25% einer Zahl ist 20. Was ist die Zahl?", "options": ["5", "80", "100", "45"], "correct_answer": 1},
-                "fr": {"question": "25% d'un nombre est 20. Quel est ce nombre?", "options": ["5", "80", "100", "45"], "correct_answer": 1},
-                "es": {"question": "El 25% de un número es 20. ¿Cuál es el número?", "options": ["5", "80", "100", "45"], "correct_answer": 1}
-            }
-        },
-        # Pattern Questions - Medium
-        {
-            "category": "pattern",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "Sıradaki sayı nedir? 1, 1, 2, 3, 5, 8, ?", "options": ["11", "12", "13", "14"], "correct_answer": 2},
-                "en": {"question": "What is the next number? 1, 1, 2, 3, 5, 8, ?", "options": ["11", "12", "13", "14"], "correct_answer": 2},
-                "de": {"question": "Was ist die nächste Zahl? 1, 1, 2, 3, 5, 8, ?", "options": ["11", "12", "13", "14"], "correct_answer": 2},
-                "fr": {"question": "Quel est le prochain nombre? 1, 1, 2, 3, 5, 8, ?", "options": ["11", "12", "13", "14"], "correct_answer": 2},
-                "es": {"question": "¿Cuál es el siguiente número? 1, 1, 2, 3, 5, 8, ?", "options": ["11", "12", "13", "14"], "correct_answer": 2}
-            }
-        },
-        # Verbal Questions - Medium
-        {
-            "category": "verbal",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "DOKTOR kelimesini tersten yazınca hangi harfle başlar?", "options": ["D", "R", "O", "K"], "correct_answer": 1},
-                "en": {"question": "If you reverse DOCTOR, what letter does it start with?", "options": ["D", "R", "O", "C"], "correct_answer": 1},
-                "de": {"question": "Wenn Sie ARZT rückwärts schreiben, mit welchem Buchstaben beginnt es?", "options": ["A", "T", "Z", "R"], "correct_answer": 1},
-                "fr": {"question": "Si vous inversez MÉDECIN, par quelle lettre commence-t-il?", "options": ["M", "N", "I", "E"], "correct_answer": 1},
-                "es": {"question": "Si inviertes DOCTOR, ¿con qué letra empieza?", "options": ["D", "R", "O", "C"], "correct_answer": 1}
-            }
-        },
-        # Logic Questions - Hard
-        {
-            "category": "logic",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "Ali, Berk'ten uzun. Can, Ali'den kısa ama Deniz'den uzun. En kısa kim?", "options": ["Ali", "Berk", "Can", "Deniz"], "correct_answer": 3},
-                "en": {"question": "Ali is taller than Berk. Can is shorter than Ali but taller than Deniz. Who is the shortest?", "options": ["Ali", "Berk", "Can", "Deniz"], "correct_answer": 3},
-                "de": {"question": "Ali ist größer als Berk. Can ist kleiner als Ali, aber größer als Deniz. Wer ist der Kleinste?", "options": ["Ali", "Berk", "Can", "Deniz"], "correct_answer": 3},
-                "fr": {"question": "Ali est plus grand que Berk. Can est plus petit qu'Ali mais plus grand que Deniz. Qui est le plus petit?", "options": ["Ali", "Berk", "Can", "Deniz"], "correct_answer": 3},
-                "es": {"question": "Ali es más alto que Berk. Can es más bajo que Ali pero más alto que Deniz. ¿Quién es el más bajo?", "options": ["Ali", "Berk", "Can", "Deniz"], "correct_answer": 3}
-            }
-        },
-        # Math Questions - Hard
-        {
-            "category": "math",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "√144 + 3³ = ?", "options": ["39", "30", "27", "45"], "correct_answer": 0},
-                "en": {"question": "√144 + 3³ = ?", "options": ["39", "30", "27", "45"], "correct_answer": 0},
-                "de": {"question": "√144 + 3³ = ?", "options": ["39", "30", "27", "45"], "correct_answer": 0},
-                "fr": {"question": "√144 + 3³ = ?", "options": ["39", "30", "27", "45"], "correct_answer": 0},
-                "es": {"question": "√144 + 3³ = ?", "options": ["39", "30", "27", "45"], "correct_answer": 0}
-            }
-        },
-        # Pattern Questions - Hard
-        {
-            "category": "pattern",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "Sıradaki sayı nedir? 2, 6, 12, 20, 30, ?", "options": ["40", "42", "44", "36"], "correct_answer": 1},
-                "en": {"question": "What is the next number? 2, 6, 12, 20, 30, ?", "options": ["40", "42", "44", "36"], "correct_answer": 1},
-                "de": {"question": "Was ist die nächste Zahl? 2, 6, 12, 20, 30, ?", "options": ["40", "42", "44", "36"], "correct_answer": 1},
-                "fr": {"question": "Quel est le prochain nombre? 2, 6, 12, 20, 30, ?", "options": ["40", "42", "44", "36"], "correct_answer": 1},
-                "es": {"question": "¿Cuál es el siguiente número? 2, 6, 12, 20, 30, ?", "options": ["40", "42", "44", "36"], "correct_answer": 1}
-            }
-        },
-        # Spatial Questions - Easy
-        {
-            "category": "spatial",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "Bir küpün kaç yüzeyi vardır?", "options": ["4", "6", "8", "12"], "correct_answer": 1},
-                "en": {"question": "How many faces does a cube have?", "options": ["4", "6", "8", "12"], "correct_answer": 1},
-                "de": {"question": "Wie viele Flächen hat ein Würfel?", "options": ["4", "6", "8", "12"], "correct_answer": 1},
-                "fr": {"question": "Combien de faces a un cube?", "options": ["4", "6", "8", "12"], "correct_answer": 1},
-                "es": {"question": "¿Cuántas caras tiene un cubo?", "options": ["4", "6", "8", "12"], "correct_answer": 1}
-            }
-        },
-        # Spatial Questions - Medium
-        {
-            "category": "spatial",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "Bir dikdörtgenin köşegenlerinin sayısı kaçtır?", "options": ["1", "2", "4", "Sonsuz"], "correct_answer": 1},
-                "en": {"question": "How many diagonals does a rectangle have?", "options": ["1", "2", "4", "Infinite"], "correct_answer": 1},
-                "de": {"question": "Wie viele Diagonalen hat ein Rechteck?", "options": ["1", "2", "4", "Unendlich"], "correct_answer": 1},
-                "fr": {"question": "Combien de diagonales a un rectangle?", "options": ["1", "2", "4", "Infini"], "correct_answer": 1},
-                "es": {"question": "¿Cuántas diagonales tiene un rectángulo?", "options": ["1", "2", "4", "Infinito"], "correct_answer": 1}
-            }
-        },
-        # Spatial Questions - Hard
-        {
-            "category": "spatial",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "Bir ikosahedronun (düzgün yirmi yüzlü) kaç köşesi vardır?", "options": ["10", "12", "20", "30"], "correct_answer": 1},
-                "en": {"question": "How many vertices does an icosahedron have?", "options": ["10", "12", "20", "30"], "correct_answer": 1},
-                "de": {"question": "Wie viele Ecken hat ein Ikosaeder?", "options": ["10", "12", "20", "30"], "correct_answer": 1},
-                "fr": {"question": "Combien de sommets a un icosaèdre?", "options": ["10", "12", "20", "30"], "correct_answer": 1},
-                "es": {"question": "¿Cuántos vértices tiene un icosaedro?", "options": ["10", "12", "20", "30"], "correct_answer": 1}
-            }
-        },
-        # Logic - Easy
-        {
-            "category": "logic",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "Ayın son günü 31 ise, ayın ilk günü hangi gündür?", "options": ["Pazartesi", "1", "31", "Bilinmiyor"], "correct_answer": 1},
-                "en": {"question": "If the last day of a month is 31, what is the first day of that month?", "options": ["Monday", "1", "31", "Unknown"], "correct_answer": 1},
-                "de": {"question": "Wenn der letzte Tag des Monats der 31. ist, welcher ist der erste Tag?", "options": ["Montag", "1", "31", "Unbekannt"], "correct_answer": 1},
-                "fr": {"question": "Si le dernier jour du mois est le 31, quel est le premier jour?", "options": ["Lundi", "1", "31", "Inconnu"], "correct_answer": 1},
-                "es": {"question": "Si el último día del mes es 31, ¿cuál es el primer día?", "options": ["Lunes", "1", "31", "Desconocido"], "correct_answer": 1}
-            }
-        },
-        # Math - Easy
-        {
-            "category": "math",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "100'ün yarısının yarısı kaçtır?", "options": ["50", "25", "12.5", "10"], "correct_answer": 1},
-                "en": {"question": "What is half of half of 100?", "options": ["50", "25", "12.5", "10"], "correct_answer": 1},
-                "de": {"question": "Was ist die Hälfte von der Hälfte von 100?", "options": ["50", "25", "12.5", "10"], "correct_answer": 1},
-                "fr": {"question": "Quelle est la moitié de la moitié de 100?", "options": ["50", "25", "12.5", "10"], "correct_answer": 1},
-                "es": {"question": "¿Cuál es la mitad de la mitad de 100?", "options": ["50", "25", "12.5", "10"], "correct_answer": 1}
-            }
-        },
-        # Verbal - Easy
-        {
-            "category": "verbal",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "'ELMA' kelimesinde kaç sesli harf var?", "options": ["1", "2", "3", "4"], "correct_answer": 1},
-                "en": {"question": "How many vowels are in the word 'APPLE'?", "options": ["1", "2", "3", "4"], "correct_answer": 1},
-                "de": {"question": "Wie viele Vokale hat das Wort 'APFEL'?", "options": ["1", "2", "3", "4"], "correct_answer": 1},
-                "fr": {"question": "Combien de voyelles y a-t-il dans le mot 'POMME'?", "options": ["1", "2", "3", "4"], "correct_answer": 1},
-                "es": {"question": "¿Cuántas vocales hay en la palabra 'MANZANA'?", "options": ["2", "3", "4", "5"], "correct_answer": 2}
-            }
-        },
-        # Logic - Medium
-        {
-            "category": "logic",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "Bir saatte dakika yelkovanı, saat yelkovanını kaç kez geçer?", "options": ["1", "2", "12", "60"], "correct_answer": 0},
-                "en": {"question": "How many times does the minute hand pass the hour hand in one hour?", "options": ["1", "2", "12", "60"], "correct_answer": 0},
-                "de": {"question": "Wie oft überholt der Minutenzeiger den Stundenzeiger in einer Stunde?", "options": ["1", "2", "12", "60"], "correct_answer": 0},
-                "fr": {"question": "Combien de fois l'aiguille des minutes dépasse-t-elle l'aiguille des heures en une heure?", "options": ["1", "2", "12", "60"], "correct_answer": 0},
-                "es": {"question": "¿Cuántas veces pasa la manecilla de los minutos a la manecilla de las horas en una hora?", "options": ["1", "2", "12", "60"], "correct_answer": 0}
-            }
-        },
-        # Pattern - Easy
-        {
-            "category": "pattern",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "Sıradaki harf nedir? A, C, E, G, ?", "options": ["H", "I", "J", "K"], "correct_answer": 1},
-                "en": {"question": "What is the next letter? A, C, E, G, ?", "options": ["H", "I", "J", "K"], "correct_answer": 1},
-                "de": {"question": "Welcher ist der nächste Buchstabe? A, C, E, G, ?", "options": ["H", "I", "J", "K"], "correct_answer": 1},
-                "fr": {"question": "Quelle est la prochaine lettre? A, C, E, G, ?", "options": ["H", "I", "J", "K"], "correct_answer": 1},
-                "es": {"question": "¿Cuál es la siguiente letra? A, C, E, G, ?", "options": ["H", "I", "J", "K"], "correct_answer": 1}
-            }
-        },
-        # Math - Hard
-        {
-            "category": "math",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "2^10 kaçtır?", "options": ["512", "1024", "2048", "256"], "correct_answer": 1},
-                "en": {"question": "What is 2^10?", "options": ["512", "1024", "2048", "256"], "correct_answer": 1},
-                "de": {"question": "Was ist 2^10?", "options": ["512", "1024", "2048", "256"], "correct_answer": 1},
-                "fr": {"question": "Combien vaut 2^10?", "options": ["512", "1024", "2048", "256"], "correct_answer": 1},
-                "es": {"question": "¿Cuánto es 2^10?", "options": ["512", "1024", "2048", "256"], "correct_answer": 1}
-            }
-        },
-        # Verbal - Hard
-        {
-            "category": "verbal",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "'Anagram' kelimesi başka hangi kelimeyle anagram oluşturur?", "options": ["Nağmara", "Mangara", "Gramana", "Hepsi"], "correct_answer": 3},
-                "en": {"question": "Which word is NOT an anagram of 'LISTEN'?", "options": ["SILENT", "ENLIST", "TINSEL", "NESTLE"], "correct_answer": 3},
-                "de": {"question": "Welches Wort ist KEIN Anagramm von 'REGAL'?", "options": ["LAGER", "LARGE", "ARGLE", "EAGLE"], "correct_answer": 3},
-                "fr": {"question": "Quel mot n'est PAS un anagramme de 'CHIEN'?", "options": ["NICHE", "CHINE", "NICHE", "CHANT"], "correct_answer": 3},
-                "es": {"question": "¿Qué palabra NO es un anagrama de 'AMOR'?", "options": ["ROMA", "MORA", "OMAR", "ARMA"], "correct_answer": 3}
-            }
-        },
-        # Logic - Hard
-        {
-            "category": "logic",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "3 tavuk 3 günde 3 yumurta bırakırsa, 12 tavuk 12 günde kaç yumurta bırakır?", "options": ["12", "36", "48", "144"], "correct_answer": 2},
-                "en": {"question": "If 3 hens lay 3 eggs in 3 days, how many eggs will 12 hens lay in 12 days?", "options": ["12", "36", "48", "144"], "correct_answer": 2},
-                "de": {"question": "Wenn 3 Hühner in 3 Tagen 3 Eier legen, wie viele Eier legen 12 Hühner in 12 Tagen?", "options": ["12", "36", "48", "144"], "correct_answer": 2},
-                "fr": {"question": "Si 3 poules pondent 3 œufs en 3 jours, combien d'œufs 12 poules pondront-elles en 12 jours?", "options": ["12", "36", "48", "144"], "correct_answer": 2},
-                "es": {"question": "Si 3 gallinas ponen 3 huevos en 3 días, ¿cuántos huevos pondrán 12 gallinas en 12 días?", "options": ["12", "36", "48", "144"], "correct_answer": 2}
-            }
-        },
-        # Pattern - Hard
-        {
-            "category": "pattern",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "Sıradaki sayı nedir? 1, 4, 9, 16, 25, ?", "options": ["30", "36", "49", "64"], "correct_answer": 1},
-                "en": {"question": "What is the next number? 1, 4, 9, 16, 25, ?", "options": ["30", "36", "49", "64"], "correct_answer": 1},
-                "de": {"question": "Was ist die nächste Zahl? 1, 4, 9, 16, 25, ?", "options": ["30", "36", "49", "64"], "correct_answer": 1},
-                "fr": {"question": "Quel est le prochain nombre? 1, 4, 9, 16, 25, ?", "options": ["30", "36", "49", "64"], "correct_answer": 1},
-                "es": {"question": "¿Cuál es el siguiente número? 1, 4, 9, 16, 25, ?", "options": ["30", "36", "49", "64"], "correct_answer": 1}
-            }
-        },
-        # Additional questions
-        {
-            "category": "logic",
-            "difficulty": "easy",
-            "translations": {
-                "tr": {"question": "Hangi ay 28 gün çeker?", "options": ["Şubat", "Hepsi", "Hiçbiri", "Sadece artık yıllarda"], "correct_answer": 1},
-                "en": {"question": "Which month has 28 days?", "options": ["February", "All of them", "None", "Only in leap years"], "correct_answer": 1},
-                "de": {"question": "Welcher Monat hat 28 Tage?", "options": ["Februar", "Alle", "Keiner", "Nur in Schaltjahren"], "correct_answer": 1},
-                "fr": {"question": "Quel mois a 28 jours?", "options": ["Février", "Tous", "Aucun", "Seulement les années bissextiles"], "correct_answer": 1},
-                "es": {"question": "¿Qué mes tiene 28 días?", "options": ["Febrero", "Todos", "Ninguno", "Solo en años bisiestos"], "correct_answer": 1}
-            }
-        },
-        {
-            "category": "math",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "Bir eşkenar üçgenin her iç açısı kaç derecedir?", "options": ["45°", "60°", "90°", "120°"], "correct_answer": 1},
-                "en": {"question": "What is each interior angle of an equilateral triangle?", "options": ["45°", "60°", "90°", "120°"], "correct_answer": 1},
-                "de": {"question": "Wie groß ist jeder Innenwinkel eines gleichseitigen Dreiecks?", "options": ["45°", "60°", "90°", "120°"], "correct_answer": 1},
-                "fr": {"question": "Quelle est la mesure de chaque angle intérieur d'un triangle équilatéral?", "options": ["45°", "60°", "90°", "120°"], "correct_answer": 1},
-                "es": {"question": "¿Cuánto mide cada ángulo interior de un triángulo equilátero?", "options": ["45°", "60°", "90°", "120°"], "correct_answer": 1}
-            }
-        },
-        {
-            "category": "verbal",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "'Kitap' kelimesinin zıt anlamlısı nedir?", "options": ["Defter", "Kalem", "Yoktur", "Sayfa"], "correct_answer": 2},
-                "en": {"question": "Which word is the opposite of 'HAPPY'?", "options": ["Sad", "Angry", "Excited", "Calm"], "correct_answer": 0},
-                "de": {"question": "Was ist das Gegenteil von 'GLÜCKLICH'?", "options": ["Traurig", "Wütend", "Aufgeregt", "Ruhig"], "correct_answer": 0},
-                "fr": {"question": "Quel est le contraire de 'HEUREUX'?", "options": ["Triste", "En colère", "Excité", "Calme"], "correct_answer": 0},
-                "es": {"question": "¿Cuál es el opuesto de 'FELIZ'?", "options": ["Triste", "Enojado", "Emocionado", "Tranquilo"], "correct_answer": 0}
-            }
-        },
-        {
-            "category": "spatial",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "Bir piramit tabanı kare ise kaç kenarı vardır?", "options": ["4", "6", "8", "5"], "correct_answer": 2},
-                "en": {"question": "How many edges does a square-based pyramid have?", "options": ["4", "6", "8", "5"], "correct_answer": 2},
-                "de": {"question": "Wie viele Kanten hat eine quadratische Pyramide?", "options": ["4", "6", "8", "5"], "correct_answer": 2},
-                "fr": {"question": "Combien d'arêtes a une pyramide à base carrée?", "options": ["4", "6", "8", "5"], "correct_answer": 2},
-                "es": {"question": "¿Cuántas aristas tiene una pirámide de base cuadrada?", "options": ["4", "6", "8", "5"], "correct_answer": 2}
-            }
-        },
-        {
-            "category": "logic",
-            "difficulty": "medium",
-            "translations": {
-                "tr": {"question": "Tom, Jerry'den büyük. Jerry, Spike'tan büyük. Spike, Tom'dan büyük olabilir mi?", "options": ["Evet", "Hayır", "Belki", "Bilgi yetersiz"], "correct_answer": 1},
-                "en": {"question": "Tom is older than Jerry. Jerry is older than Spike. Can Spike be older than Tom?", "options": ["Yes", "No", "Maybe", "Insufficient info"], "correct_answer": 1},
-                "de": {"question": "Tom ist älter als Jerry. Jerry ist älter als Spike. Kann Spike älter als Tom sein?", "options": ["Ja", "Nein", "Vielleicht", "Nicht genug Info"], "correct_answer": 1},
-                "fr": {"question": "Tom est plus vieux que Jerry. Jerry est plus vieux que Spike. Spike peut-il être plus vieux que Tom?", "options": ["Oui", "Non", "Peut-être", "Info insuffisante"], "correct_answer": 1},
-                "es": {"question": "Tom es mayor que Jerry. Jerry es mayor que Spike. ¿Puede Spike ser mayor que Tom?", "options": ["Sí", "No", "Quizás", "Info insuficiente"], "correct_answer": 1}
-            }
-        },
-        {
-            "category": "math",
-            "difficulty": "hard",
-            "translations": {
-                "tr": {"question": "5! (5 faktöriyel) kaçtır?", "options": ["25", "60", "120", "720"], "correct_answer": 2},
-                "en": {"question": "What is 5! (5 factorial)?", "options": ["25", "60", "120", "720"], "correct_answer": 2},
-                "de": {"question": "Was ist 5! (5 Fakultät)?", "options": ["25", "60", "120", "720"], "correct_answer": 2},
-                "fr": {"question": "Combien vaut 5! (factorielle de 5)?", "options": ["25", "60", "120", "720"], "correct_answer": 2},
-                "es": {"question": "¿Cuánto es 5! (factorial de 5)?", "options": ["25", "60", "120", "720"], "correct_answer": 2}
-            }
-        }
+    # Upserting on content_hash (unique) lets concurrent workers race safely
+    await db.questions.create_index('content_hash', unique=True, sparse=True)
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {'content_hash': q['content_hash']},
+            {'$setOnInsert': {**q, 'id': str(uuid.uuid4()), 'created_at': now}},
+            upsert=True
+        )
+        for q in load_sample_questions()
     ]
+    try:
+        result = await db.questions.bulk_write(operations, ordered=False)
+        created = result.upserted_count
+    except BulkWriteError as e:
+        # Duplicate key errors mean another worker seeded the same question first
+        if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+            raise
+        created = e.details.get('nUpserted', 0)
     
-    for q in sample_questions:
-        q['id'] = str(uuid.uuid4())
-        q['created_at'] = datetime.utcnow()
-        await db.questions.insert_one(q)
+    await question_bank.load()
     
-    return {"message": f"Created {len(sample_questions)} sample questions"}
+    return {"message": f"Created {created} sample questions"}
 
 # Include the router
 app.include_router(api_router)
@@ -944,6 +3579,119 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_indexes():
+    # A missing unique index silently breaks de-duplication across workers
+    # (daily challenges, questions), so failing to build one stops startup.
+    # An unreachable database does not: routes fall back as before and the
+    # indexes are built once it answers.
+    try:
+        await asyncio.wait_for(client.admin.command('ping'), STARTUP_DB_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.error(f"MongoDB not reachable within {STARTUP_DB_TIMEOUT_SECONDS:g}s of startup "
+                     f"({str(e) or type(e).__name__}); building indexes in the background")
+        background_tasks.append(asyncio.create_task(ensure_indexes_when_reachable()))
+        return
+    database_status['reachable_at_startup'] = True
+    failures = await ensure_indexes()
+    if failures:
+        raise RuntimeError(f"Could not build MongoDB indexes: {'; '.join(failures)}")
+
+async def ensure_indexes_when_reachable():
+    while True:
+        await asyncio.sleep(STARTUP_DB_TIMEOUT_SECONDS)
+        try:
+            await asyncio.wait_for(client.admin.command('ping'), STARTUP_DB_TIMEOUT_SECONDS)
+        except Exception:
+            continue
+        failures = await ensure_indexes()
+        if failures:
+            logger.critical(f"Could not build MongoDB indexes: {'; '.join(failures)}")
+        return
+
+@app.on_event("startup")
+async def startup_question_bank():
+    # Routes fall back to querying MongoDB until the next refresh succeeds
+    if database_status['reachable_at_startup']:
+        try:
+            await question_bank.load()
+        except Exception as e:
+            logger.error(f"Question bank load failed: {str(e)}")
+    if QUESTION_BANK_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            refresh_loop(question_bank, QUESTION_BANK_REFRESH_SECONDS, "Question bank")
+        ))
+
+@app.on_event("startup")
+async def startup_item_parameters():
+    if database_status['reachable_at_startup']:
+        try:
+            await item_parameters.load()
+        except Exception as e:
+            logger.error(f"Item statistics load failed: {str(e)}")
+    if ITEM_STATS_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            refresh_loop(item_parameters, ITEM_STATS_REFRESH_SECONDS, "Item statistics")
+        ))
+
+@app.on_event("startup")
+async def startup_score_read_models():
+    # Leaderboards and rank histograms are built once; the feed keeps them current
+    score_feed.tail.start(datetime.utcnow())
+    if database_status['reachable_at_startup']:
+        try:
+            await leaderboards.load()
+        except Exception as e:
+            logger.error(f"Leaderboard load failed: {str(e)}")
+        try:
+            await score_histograms.load()
+            # Scores of the last slack seconds are left to the feed; take them now
+            await score_feed.refresh()
+        except Exception as e:
+            logger.error(f"Score histogram load failed: {str(e)}")
+    if LEADERBOARD_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            refresh_loop(score_feed, LEADERBOARD_REFRESH_SECONDS, "Score feed")
+        ))
+
+@app.on_event("startup")
+async def startup_daily_scheduler():
+    if DAILY_CHALLENGE_DAYS_AHEAD >= 0:
+        background_tasks.append(asyncio.create_task(
+            daily_challenge_scheduler(DAILY_CHALLENGE_DAYS_AHEAD, DAILY_SCHEDULER_INTERVAL_SECONDS)
+        ))
+
+@app.on_event("startup")
+async def startup_completion_counter():
+    background_tasks.append(asyncio.create_task(completion_counter.run()))
+
+@app.on_event("startup")
+async def startup_ai_pool():
+    if ai_pool.enabled and AI_POOL_PREFILL:
+        ai_pool.prefill()
+
+@app.on_event("startup")
+async def startup_multiplayer():
+    background_tasks.append(asyncio.create_task(room_manager.matchmaker(1.0)))
+
+@app.on_event("startup")
+async def startup_score_writer():
+    if SCORE_WRITE_BEHIND:
+        score_writer.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    ai_pool.close()
+    room_manager.close()
+    leaderboard_streams.close()
+    try:
+        await score_writer.close()
+    except Exception as e:
+        logger.error(f"Could not drain {len(score_writer.pending)} pending scores: {str(e)}")
+    try:
+        await completion_counter.flush()
+    except Exception as e:
+        logger.error(f"Could not flush daily completions: {str(e)}")
     client.close()
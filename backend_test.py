@@ -9,6 +9,7 @@ import json
 import time
 from datetime import datetime
 import random
+from websockets.sync.client import connect
 
 # Get backend URL from frontend env
 BACKEND_URL = "https://smart-trivia-game-1.preview.emergentagent.com/api"
@@ -110,8 +111,10 @@ class IQGameAPITester:
                 data = response.json()
                 if isinstance(data, list) and len(data) > 0:
                     question = data[0]
-                    required_fields = ['id', 'category', 'difficulty', 'question', 'options', 'correct_answer']
-                    if all(field in question for field in required_fields):
+                    required_fields = ['id', 'category', 'difficulty', 'question', 'options']
+                    if 'correct_answer' in question:
+                        self.log_result("Get Questions Basic", False, "Answer key exposed in question payload", response)
+                    elif all(field in question for field in required_fields):
                         self.log_result("Get Questions Basic", True, f"Retrieved {len(data)} questions")
                     else:
                         missing = [f for f in required_fields if f not in question]
@@ -170,14 +173,23 @@ class IQGameAPITester:
         for lang in ['en', 'tr', 'de']:  # Test a few languages
             try:
                 user_name = random.choice(USER_NAMES[lang])
+                mode, difficulty = random.choice(MODES), random.choice(DIFFICULTIES)
+                # Scores are graded from a game session; random answers stand in for a player
+                game = self.session.post(f"{BACKEND_URL}/sessions", json={
+                    "mode": mode, "difficulty": difficulty, "language": lang, "count": 10
+                }).json()
+                questions = game['questions']
+                answers = [random.randrange(len(q['options'])) for q in questions]
+                self.session.post(f"{BACKEND_URL}/sessions/{game['session_token']}/grade", json={"answers": answers})
                 score_data = {
                     "user_name": user_name,
                     "score": random.randint(60, 95),
-                    "total_questions": 10,
+                    "total_questions": len(questions),
                     "correct_answers": random.randint(6, 9),
-                    "difficulty": random.choice(DIFFICULTIES),
-                    "mode": random.choice(MODES),
-                    "language": lang
+                    "difficulty": game['difficulty'],
+                    "mode": mode,
+                    "language": lang,
+                    "session_token": game['session_token']
                 }
                 
                 response = self.session.post(f"{BACKEND_URL}/scores", json=score_data)
@@ -251,6 +263,205 @@ class IQGameAPITester:
             except Exception as e:
                 self.log_result(f"Leaderboard Filter {mode.title()}", False, f"Exception: {str(e)}")
     
+    def test_bulk_questions_ndjson(self):
+        """Test POST /api/questions/bulk with an NDJSON stream and its per-item report"""
+        try:
+            stamp = int(time.time() * 1000)
+            question = lambda n: {"category": "logic", "difficulty": "easy", "translations": {
+                "en": {"question": f"Bulk test {stamp}-{n}: 2 + {n} = ?", "options": [str(2 + n), "0"], "correct_answer": 0}
+            }}
+            lines = [
+                json.dumps(question(1)),
+                "{not json",
+                json.dumps({"category": "logic", "difficulty": "extreme", "translations": question(2)["translations"]}),
+                json.dumps(question(3)),
+                json.dumps(question(1))
+            ]
+            response = self.session.post(f"{BACKEND_URL}/questions/bulk", data="\n".join(lines).encode(),
+                                         headers={'Content-Type': 'application/x-ndjson'})
+            if response.status_code != 200:
+                self.log_result("Bulk Questions NDJSON", False, f"HTTP {response.status_code}", response)
+                return
+            data = response.json()
+            inserted = [item['index'] for item in data['ids']]
+            failed = [error['index'] for error in data['errors']]
+            if data['total'] == 5 and inserted == [0, 3] and failed == [1, 2, 4]:
+                self.log_result("Bulk Questions NDJSON", True, f"Inserted {data['inserted']}, failed {data['failed']}")
+            else:
+                self.log_result("Bulk Questions NDJSON", False, f"Unexpected report: inserted {inserted}, failed {failed}", response)
+        except Exception as e:
+            self.log_result("Bulk Questions NDJSON", False, f"Exception: {str(e)}")
+    
+    def test_leaderboard_windows(self):
+        """Test GET /api/scores/leaderboard with window=daily/weekly/monthly"""
+        try:
+            today = datetime.utcnow().strftime('%Y-%m-%d')
+            sizes = {}
+            for window in ['daily', 'weekly', 'monthly', 'all']:
+                response = self.session.get(f"{BACKEND_URL}/scores/leaderboard?window={window}&limit=50")
+                if response.status_code != 200:
+                    self.log_result("Leaderboard Windows", False, f"{window}: HTTP {response.status_code}", response)
+                    return
+                data = response.json()
+                if any(data[i]['estimated_iq'] < data[i + 1]['estimated_iq'] for i in range(len(data) - 1)):
+                    self.log_result("Leaderboard Windows", False, f"{window} board not sorted by IQ", response)
+                    return
+                if window == 'daily' and any(entry['date'] != today for entry in data):
+                    self.log_result("Leaderboard Windows", False, "Daily board holds scores from other days", response)
+                    return
+                sizes[window] = len(data)
+            invalid = self.session.get(f"{BACKEND_URL}/scores/leaderboard?window=yearly")
+            # Scores were submitted earlier in this run, and wider windows hold at least as many
+            if (invalid.status_code == 422 and sizes['daily'] > 0
+                    and sizes['daily'] <= sizes['weekly'] <= sizes['monthly'] <= sizes['all']):
+                self.log_result("Leaderboard Windows", True, f"Entries per window: {sizes}")
+            else:
+                self.log_result("Leaderboard Windows", False, f"Entries per window: {sizes}, unknown window HTTP {invalid.status_code}", invalid)
+        except Exception as e:
+            self.log_result("Leaderboard Windows", False, f"Exception: {str(e)}")
+    
+    def test_score_rank(self):
+        """Test GET /api/scores/rank against the leaderboard"""
+        try:
+            board = self.session.get(f"{BACKEND_URL}/scores/leaderboard?limit=1").json()
+            if not board:
+                self.log_result("Score Rank", True, "No scores yet")
+                return
+            top_iq = board[0]['estimated_iq']
+            top = self.session.get(f"{BACKEND_URL}/scores/rank?estimated_iq={top_iq}")
+            above = self.session.get(f"{BACKEND_URL}/scores/rank?estimated_iq={top_iq + 1}")
+            below = self.session.get(f"{BACKEND_URL}/scores/rank?estimated_iq=0")
+            if any(r.status_code != 200 for r in (top, above, below)):
+                self.log_result("Score Rank", False, "Rank lookup failed", next(r for r in (top, above, below) if r.status_code != 200))
+                return
+            top, above, below = top.json(), above.json(), below.json()
+            # rank counts strictly higher scores; percentile is the share strictly lower
+            if (top['rank'] == 1 and above['rank'] == 1 and above['percentile'] == 100.0
+                    and below['rank'] == below['total'] + 1 and below['percentile'] == 0.0
+                    and top['top_percent'] == round(100 / top['total'], 1) and below['top_percent'] == 100.0):
+                self.log_result("Score Rank", True, f"IQ {top_iq}: rank {top['rank']} of {top['total']}, percentile {top['percentile']}")
+            else:
+                self.log_result("Score Rank", False, f"Unexpected ranks: top {top}, above {above}, below {below}")
+        except Exception as e:
+            self.log_result("Score Rank", False, f"Exception: {str(e)}")
+    
+    def test_time_race_session(self):
+        """Test POST /api/sessions, answers, and a score graded from the session"""
+        try:
+            response = self.session.post(f"{BACKEND_URL}/sessions", json={"mode": "time_race", "difficulty": "easy", "count": 5})
+            if response.status_code != 200:
+                self.log_result("Time Race Session", False, f"HTTP {response.status_code}", response)
+                return
+            data = response.json()
+            token, questions = data['session_token'], data['questions']
+            if any('correct_answer' in question for question in questions):
+                self.log_result("Time Race Session", False, "Answer key exposed in session questions", response)
+                return
+            correct = 0
+            for i, question in enumerate(questions):
+                answer = self.session.post(f"{BACKEND_URL}/sessions/{token}/answers", json={"index": i, "answer": 0})
+                if answer.status_code != 200 or 'correct_answer' not in answer.json():
+                    self.log_result("Time Race Session", False, f"Answer {i} not accepted", answer)
+                    return
+                correct += answer.json()['correct']
+            grade = self.session.post(f"{BACKEND_URL}/sessions/{token}/grade", json={"answers": []}).json()
+            # Claimed counts are ignored in favour of the server's grading
+            score_data = {
+                "user_name": "Racer", "score": 10 * len(questions), "total_questions": len(questions),
+                "correct_answers": len(questions), "difficulty": "easy", "mode": "time_race",
+                "language": "en", "session_token": token
+            }
+            response = self.session.post(f"{BACKEND_URL}/scores", json=score_data)
+            reused = self.session.post(f"{BACKEND_URL}/scores", json=score_data)
+            if (response.status_code == 200 and reused.status_code == 404 and grade['correct_answers'] == correct
+                    and response.json()['estimated_iq'] == grade['estimated_iq']):
+                self.log_result("Time Race Session", True, f"{correct}/{len(questions)} correct, IQ: {grade['estimated_iq']}")
+            else:
+                self.log_result("Time Race Session", False, f"HTTP {response.status_code}, reuse HTTP {reused.status_code}", response)
+        except Exception as e:
+            self.log_result("Time Race Session", False, f"Exception: {str(e)}")
+    
+    def test_adaptive_session(self):
+        """Test POST /api/adaptive/sessions picks questions until the estimate settles"""
+        try:
+            response = self.session.post(f"{BACKEND_URL}/adaptive/sessions", json={"language": "en"})
+            if response.status_code != 200:
+                self.log_result("Adaptive Session", False, f"HTTP {response.status_code}", response)
+                return
+            data = response.json()
+            token, question, seen = data['session_token'], data['question'], []
+            while question:
+                if 'correct_answer' in question or question['id'] in seen:
+                    self.log_result("Adaptive Session", False, "Answer key exposed or question repeated", response)
+                    return
+                seen.append(question['id'])
+                response = self.session.post(f"{BACKEND_URL}/adaptive/sessions/{token}/answers", json={"answer": 0})
+                if response.status_code != 200:
+                    self.log_result("Adaptive Session", False, f"Answer {len(seen)} not accepted", response)
+                    return
+                step = response.json()
+                question = step['next']['question'] if step['next'] else None
+            score_data = {
+                "user_name": "Adaptive", "score": 0, "total_questions": 0, "correct_answers": 0,
+                "difficulty": "medium", "mode": "adaptive", "language": "en", "session_token": token
+            }
+            response = self.session.post(f"{BACKEND_URL}/scores", json=score_data)
+            if response.status_code == 200 and response.json()['estimated_iq'] == step['estimated_iq']:
+                self.log_result("Adaptive Session", True, f"{len(seen)} questions, theta {step['theta']} ± {step['se']}")
+            else:
+                self.log_result("Adaptive Session", False, f"HTTP {response.status_code}", response)
+        except Exception as e:
+            self.log_result("Adaptive Session", False, f"Exception: {str(e)}")
+    
+    def test_leaderboard_stream(self):
+        """Test GET /api/scores/leaderboard/stream sends an initial snapshot"""
+        try:
+            response = self.session.get(f"{BACKEND_URL}/scores/leaderboard/stream?difficulty=easy", stream=True, timeout=10)
+            if response.status_code != 200:
+                self.log_result("Leaderboard Stream", False, f"HTTP {response.status_code}", response)
+                return
+            lines = response.iter_lines(decode_unicode=True)
+            event, data = next(lines), next(lines)
+            response.close()
+            if event == 'event: snapshot' and isinstance(json.loads(data[len('data: '):]).get('rows'), list):
+                self.log_result("Leaderboard Stream", True, "Snapshot event received")
+            else:
+                self.log_result("Leaderboard Stream", False, f"Unexpected first event: {event} {data[:100]}")
+        except Exception as e:
+            self.log_result("Leaderboard Stream", False, f"Exception: {str(e)}")
+    
+    def test_multiplayer_socket(self):
+        """Test WS /api/ws/multiplayer matches two players and plays a round"""
+        def next_message(socket, kind):
+            while True:
+                message = json.loads(socket.recv(timeout=10))
+                if message['type'] in (kind, 'error'):
+                    return message
+        try:
+            url = BACKEND_URL.replace('http', 'ws', 1) + "/ws/multiplayer"
+            with connect(url) as first, connect(url) as second:
+                first.send("[]")
+                invalid = next_message(first, 'error')
+                for i, socket in enumerate((first, second)):
+                    socket.send(json.dumps({"type": "join", "language": "es", "difficulty": "hard", "name": f"Tester {i}"}))
+                starts = [next_message(socket, 'start') for socket in (first, second)]
+                questions = [next_message(socket, 'question') for socket in (first, second)]
+                if any(m['type'] == 'error' for m in starts + questions) or starts[0]['room'] != starts[1]['room']:
+                    self.log_result("Multiplayer Socket", False, f"Players not matched: {starts + questions}")
+                    return
+                if 'correct_answer' in questions[0]['question']:
+                    self.log_result("Multiplayer Socket", False, "Answer key exposed in multiplayer question")
+                    return
+                for socket in (first, second):
+                    socket.send(json.dumps({"type": "answer", "round": 0, "answer": 0}))
+                result = next_message(first, 'round_result')
+            if invalid['type'] == 'error' and result['type'] == 'round_result' and len(result['results']) == 2:
+                self.log_result("Multiplayer Socket", True, f"Room {starts[0]['room']}, {starts[0]['rounds']} rounds")
+            else:
+                self.log_result("Multiplayer Socket", False, f"Unexpected frames: {invalid}, {result}")
+        except Exception as e:
+            self.log_result("Multiplayer Socket", False, f"Exception: {str(e)}")
+    
     def test_daily_challenge(self):
         """Test GET /api/daily-challenge"""
         for lang in ['en', 'tr']:
@@ -258,16 +469,16 @@ class IQGameAPITester:
                 response = self.session.get(f"{BACKEND_URL}/daily-challenge?language={lang}")
                 if response.status_code == 200:
                     data = response.json()
-                    required_fields = ['date', 'completions', 'questions']
+                    required_fields = ['date', 'questions']
                     if all(field in data for field in required_fields):
                         questions = data['questions']
                         if isinstance(questions, list) and len(questions) > 0:
                             # Verify question structure
                             question = questions[0]
-                            q_fields = ['id', 'category', 'difficulty', 'question', 'options', 'correct_answer']
-                            if all(field in question for field in q_fields):
+                            q_fields = ['id', 'category', 'difficulty', 'question', 'options']
+                            if all(field in question for field in q_fields) and 'correct_answer' not in question:
                                 self.log_result(f"Daily Challenge {lang.upper()}", True, 
-                                              f"Date: {data['date']}, Questions: {len(questions)}, Completions: {data['completions']}")
+                                              f"Date: {data['date']}, Questions: {len(questions)}, ETag: {response.headers.get('ETag')}")
                             else:
                                 self.log_result(f"Daily Challenge {lang.upper()}", False, "Invalid question structure", response)
                         else:
@@ -280,6 +491,38 @@ class IQGameAPITester:
             except Exception as e:
                 self.log_result(f"Daily Challenge {lang.upper()}", False, f"Exception: {str(e)}")
     
+    def test_daily_challenge_revalidation(self):
+        """Test GET /api/daily-challenge returns 304 for a matching ETag"""
+        try:
+            response = self.session.get(f"{BACKEND_URL}/daily-challenge?language=en")
+            etag = response.headers.get('ETag')
+            if response.status_code != 200 or not etag:
+                self.log_result("Daily Challenge ETag", False, "Missing ETag header", response)
+                return
+            response = self.session.get(f"{BACKEND_URL}/daily-challenge?language=en",
+                                        headers={'If-None-Match': etag})
+            if response.status_code == 304:
+                self.log_result("Daily Challenge ETag", True, f"304 Not Modified for {etag}")
+            else:
+                self.log_result("Daily Challenge ETag", False, f"Expected 304, got HTTP {response.status_code}", response)
+        except Exception as e:
+            self.log_result("Daily Challenge ETag", False, f"Exception: {str(e)}")
+    
+    def test_daily_challenge_completions(self):
+        """Test GET /api/daily-challenge/completions"""
+        try:
+            response = self.session.get(f"{BACKEND_URL}/daily-challenge/completions")
+            if response.status_code == 200:
+                data = response.json()
+                if isinstance(data.get('completions'), int) and 'date' in data:
+                    self.log_result("Daily Challenge Completions", True, f"Completions: {data['completions']}")
+                else:
+                    self.log_result("Daily Challenge Completions", False, "Invalid response format", response)
+            else:
+                self.log_result("Daily Challenge Completions", False, f"HTTP {response.status_code}", response)
+        except Exception as e:
+            self.log_result("Daily Challenge Completions", False, f"Exception: {str(e)}")
+    
     def test_daily_challenge_complete(self):
         """Test POST /api/daily-challenge/complete"""
         try:
@@ -333,6 +576,25 @@ class IQGameAPITester:
                 self.log_result(f"AI Question Gen {case['language'].upper()}-{case['difficulty'].title()}", 
                               False, f"Exception: {str(e)}")
     
+    def test_ai_question_batch(self):
+        """Test POST /api/generate-questions/batch and its report"""
+        try:
+            response = self.session.post(f"{BACKEND_URL}/generate-questions/batch",
+                                         json={"difficulty": "medium", "category": "pattern", "count": 3})
+            if response.status_code != 200:
+                self.log_result("AI Question Batch", False, f"HTTP {response.status_code}", response)
+                return
+            data = response.json()
+            questions, report = data['questions'], data['report']
+            if (report['requested'] == 3 and len(questions) == report['valid'] <= 3
+                    and all(q.get('id') and 'en' in q.get('languages', []) for q in questions)):
+                self.log_result("AI Question Batch", True,
+                                f"{report['valid']} valid, {report['invalid']} invalid, {report['duplicates']} duplicates")
+            else:
+                self.log_result("AI Question Batch", False, f"Unexpected batch: {len(questions)} questions, report {report}", response)
+        except Exception as e:
+            self.log_result("AI Question Batch", False, f"Exception: {str(e)}")
+    
     def run_all_tests(self):
         """Run all API tests"""
         print("🚀 Starting IQ Game Backend API Tests")
@@ -349,18 +611,30 @@ class IQGameAPITester:
         self.test_get_questions_basic()
         self.test_get_questions_all_languages()
         self.test_get_questions_by_difficulty()
+        self.test_bulk_questions_ndjson()
         
         # Score system tests
         self.test_score_submission()
+        self.test_time_race_session()
+        self.test_adaptive_session()
         self.test_leaderboard_basic()
         self.test_leaderboard_filtering()
+        self.test_leaderboard_windows()
+        self.test_score_rank()
+        self.test_leaderboard_stream()
+        
+        # Multiplayer tests
+        self.test_multiplayer_socket()
         
         # Daily challenge tests
         self.test_daily_challenge()
+        self.test_daily_challenge_revalidation()
         self.test_daily_challenge_complete()
+        self.test_daily_challenge_completions()
         
         # AI generation tests
         self.test_ai_question_generation()
+        self.test_ai_question_batch()
         
         # Summary
         print("=" * 50)
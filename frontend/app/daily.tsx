@@ -46,8 +46,11 @@ export default function DailyScreen() {
   const fetchDailyChallenge = async () => {
     try {
       setLoading(true);
-      const data = await apiService.getDailyChallenge(language);
-      setDailyData(data);
+      const [data, completions] = await Promise.all([
+        apiService.getDailyChallenge(language),
+        apiService.getDailyCompletions(),
+      ]);
+      setDailyData({ ...data, completions });
     } catch (error) {
       console.error('Failed to fetch daily challenge:', error);
     } finally {
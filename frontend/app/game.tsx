@@ -36,6 +36,8 @@ export default function GameScreen() {
     addTimeBonus,
     decrementTime,
     setTimeLeft,
+    sessionToken,
+    setSessionToken,
     startGame,
     endGame,
   } = useGameStore();
@@ -45,6 +47,9 @@ export default function GameScreen() {
   const [selectedAnswer, setSelectedAnswer] = useState<number | null>(null);
   const [showResult, setShowResult] = useState(false);
   const [isCorrect, setIsCorrect] = useState(false);
+  const [revealedAnswer, setRevealedAnswer] = useState<number | null>(null);
+  // Daily answers are only recorded; the server grades them when the score is submitted
+  const [answerHidden, setAnswerHidden] = useState(false);
   const [generating, setGenerating] = useState(false);
 
   const scaleAnim = useRef(new Animated.Value(1)).current;
@@ -56,18 +61,14 @@ export default function GameScreen() {
     const loadQuestions = async () => {
       try {
         setLoading(true);
-        const fetchedQuestions = await apiService.getQuestions(
-          difficulty,
-          undefined,
-          language,
-          10
-        );
-        setQuestions(fetchedQuestions);
+        // The server keeps the answer key and the race clock for the session
+        const session = await apiService.createSession(gameMode, difficulty, language, 10);
+        setSessionToken(session.session_token);
+        setQuestions(session.questions);
         startGame();
         
-        // Set initial time based on mode
         if (gameMode === 'time_race') {
-          setTimeLeft(30); // Start with 30 seconds for time race
+          setTimeLeft(session.time_limit ?? 30);
         }
       } catch (error) {
         console.error('Failed to load questions:', error);
@@ -114,8 +115,27 @@ export default function GameScreen() {
 
     setSelectedAnswer(answerIndex);
     const question = questions[currentQuestion];
-    const correct = answerIndex === question.correct_answer;
+    let correct = false;
+    let correctAnswer: number | null = question.correct_answer ?? null;
+    let serverTimeLeft: number | undefined;
+    let hidden = false;
+
+    if (correctAnswer === null && sessionToken) {
+      try {
+        const result = await apiService.recordAnswer(sessionToken, currentQuestion, answerIndex);
+        hidden = result.correct === undefined;
+        correct = result.correct ?? false;
+        correctAnswer = result.correct_answer ?? null;
+        serverTimeLeft = result.time_left;
+      } catch (error) {
+        console.error('Failed to record answer:', error);
+      }
+    } else {
+      correct = answerIndex === correctAnswer;
+    }
+    setRevealedAnswer(correctAnswer);
     setIsCorrect(correct);
+    setAnswerHidden(hidden);
     setShowResult(true);
 
     // Calculate points based on difficulty
@@ -129,6 +149,10 @@ export default function GameScreen() {
       const bonusTime = { easy: 5, medium: 7, hard: 10 }[difficulty];
       addTimeBonus(bonusTime);
     }
+    // The server clock, which already includes the bonus, wins
+    if (serverTimeLeft !== undefined) {
+      setTimeLeft(Math.ceil(serverTimeLeft));
+    }
 
     // Animation
     Animated.sequence([
@@ -148,6 +172,7 @@ export default function GameScreen() {
         handleGameOver();
       } else {
         setSelectedAnswer(null);
+        setRevealedAnswer(null);
         setShowResult(false);
         nextQuestion();
       }
@@ -261,9 +286,11 @@ export default function GameScreen() {
           let borderColor = 'transparent';
 
           if (showResult) {
-            if (index === question.correct_answer) {
+            if (index === revealedAnswer) {
               backgroundColor = '#4ECDC420';
               borderColor = '#4ECDC4';
+            } else if (index === selectedAnswer && answerHidden) {
+              borderColor = '#4ECDC4';
             } else if (index === selectedAnswer && !isCorrect) {
               backgroundColor = '#FF6B6B20';
               borderColor = '#FF6B6B';
@@ -288,12 +315,13 @@ export default function GameScreen() {
                 </Text>
               </View>
               <Text style={styles.optionText}>{option}</Text>
-              {showResult && index === question.correct_answer && (
+              {showResult && index === revealedAnswer && (
                 <Ionicons name="checkmark-circle" size={24} color="#4ECDC4" />
               )}
               {showResult &&
                 index === selectedAnswer &&
-                !isCorrect && (
+                !isCorrect &&
+                !answerHidden && (
                   <Ionicons name="close-circle" size={24} color="#FF6B6B" />
                 )}
             </TouchableOpacity>
@@ -304,11 +332,15 @@ export default function GameScreen() {
       {/* Result Indicator */}
       {showResult && (
         <View style={styles.resultContainer}>
-          <Text
-            style={[styles.resultText, { color: isCorrect ? '#4ECDC4' : '#FF6B6B' }]}
-          >
-            {isCorrect ? t.correct : t.incorrect}
-          </Text>
+          {answerHidden ? (
+            <Text style={[styles.resultText, { color: '#a0a0a0' }]}>{t.answerSaved}</Text>
+          ) : (
+            <Text
+              style={[styles.resultText, { color: isCorrect ? '#4ECDC4' : '#FF6B6B' }]}
+            >
+              {isCorrect ? t.correct : t.incorrect}
+            </Text>
+          )}
           {gameMode === 'time_race' && isCorrect && (
             <Text style={styles.bonusText}>
               +{({ easy: 5, medium: 7, hard: 10 }[difficulty])}s {t.timeBonus}
@@ -1,4 +1,4 @@
-import React, { useEffect } from 'react';
+import React, { useEffect, useState } from 'react';
 import {
   View,
   Text,
@@ -11,7 +11,7 @@ import { useRouter } from 'expo-router';
 import { Ionicons } from '@expo/vector-icons';
 import { useGameStore } from '../src/store/gameStore';
 import { translations } from '../src/i18n/translations';
-import { apiService } from '../src/services/api';
+import { apiService, ScoreResult } from '../src/services/api';
 
 const { width } = Dimensions.get('window');
 
@@ -26,10 +26,13 @@ export default function ResultScreen() {
     difficulty,
     gameMode,
     timeBonus,
+    sessionToken,
     resetGame,
   } = useGameStore();
 
   const t = translations[language];
+  // Daily answers are graded only on submission, so the server's numbers win once known
+  const [graded, setGraded] = useState<ScoreResult | null>(null);
 
   // Calculate IQ
   const calculateIQ = () => {
@@ -44,13 +47,15 @@ export default function ResultScreen() {
     return Math.round(Math.max(70, Math.min(160, baseIQ + difficultyBonus + timeBonusIQ)));
   };
 
-  const estimatedIQ = calculateIQ();
+  const estimatedIQ = graded?.estimated_iq ?? calculateIQ();
+  const finalScore = graded?.score ?? currentScore;
+  const finalCorrect = graded?.correct_answers ?? correctAnswers;
 
   // Submit score to backend
   useEffect(() => {
     const submitScore = async () => {
       try {
-        await apiService.submitScore({
+        const result = await apiService.submitScore({
           user_name: playerName,
           score: currentScore,
           total_questions: totalQuestions,
@@ -58,7 +63,9 @@ export default function ResultScreen() {
           difficulty,
           mode: gameMode,
           language,
+          session_token: sessionToken ?? undefined,
         });
+        setGraded(result);
       } catch (error) {
         console.error('Failed to submit score:', error);
       }
@@ -77,7 +84,7 @@ export default function ResultScreen() {
   };
 
   const iqCategory = getIQCategory();
-  const accuracy = totalQuestions > 0 ? Math.round((correctAnswers / totalQuestions) * 100) : 0;
+  const accuracy = totalQuestions > 0 ? Math.round((finalCorrect / totalQuestions) * 100) : 0;
 
   const handlePlayAgain = () => {
     resetGame();
@@ -115,13 +122,13 @@ export default function ResultScreen() {
       <View style={styles.statsContainer}>
         <View style={styles.statCard}>
           <Ionicons name="star" size={32} color="#FFD93D" />
-          <Text style={styles.statValue}>{currentScore}</Text>
+          <Text style={styles.statValue}>{finalScore}</Text>
           <Text style={styles.statLabel}>{t.score}</Text>
         </View>
         <View style={styles.statCard}>
           <Ionicons name="checkmark-circle" size={32} color="#4ECDC4" />
           <Text style={styles.statValue}>
-            {correctAnswers}/{totalQuestions}
+            {finalCorrect}/{totalQuestions}
           </Text>
           <Text style={styles.statLabel}>{accuracy}%</Text>
         </View>
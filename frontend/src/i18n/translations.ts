@@ -27,6 +27,7 @@ export const translations: Record<Language, Record<string, string>> = {
     timeLeft: 'Kalan Süre',
     correct: 'Doğru!',
     incorrect: 'Yanlış!',
+    answerSaved: 'Cevap kaydedildi',
     gameOver: 'Oyun Bitti',
     yourScore: 'Puanınız',
     estimatedIQ: 'Tahmini IQ',
@@ -70,6 +71,7 @@ export const translations: Record<Language, Record<string, string>> = {
     timeLeft: 'Time Left',
     correct: 'Correct!',
     incorrect: 'Incorrect!',
+    answerSaved: 'Answer saved',
     gameOver: 'Game Over',
     yourScore: 'Your Score',
     estimatedIQ: 'Estimated IQ',
@@ -113,6 +115,7 @@ export const translations: Record<Language, Record<string, string>> = {
     timeLeft: 'Verbleibende Zeit',
     correct: 'Richtig!',
     incorrect: 'Falsch!',
+    answerSaved: 'Antwort gespeichert',
     gameOver: 'Spiel vorbei',
     yourScore: 'Ihre Punkte',
     estimatedIQ: 'Geschätzter IQ',
@@ -156,6 +159,7 @@ export const translations: Record<Language, Record<string, string>> = {
     timeLeft: 'Temps restant',
     correct: 'Correct!',
     incorrect: 'Incorrect!',
+    answerSaved: 'Réponse enregistrée',
     gameOver: 'Fin du jeu',
     yourScore: 'Votre score',
     estimatedIQ: 'QI estimé',
@@ -199,6 +203,7 @@ export const translations: Record<Language, Record<string, string>> = {
     timeLeft: 'Tiempo restante',
     correct: '¡Correcto!',
     incorrect: '¡Incorrecto!',
+    answerSaved: 'Respuesta guardada',
     gameOver: 'Juego terminado',
     yourScore: 'Tu puntuación',
     estimatedIQ: 'CI estimado',
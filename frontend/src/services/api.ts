@@ -16,6 +16,29 @@ export interface ScoreData {
   difficulty: string;
   mode: string;
   language: string;
+  session_token?: string;
+}
+
+export interface GameSession {
+  session_token: string;
+  questions: Question[];
+  time_limit?: number;
+  bonus_seconds?: number;
+}
+
+export interface SessionAnswerResult {
+  index: number;
+  // Left out for daily challenges until the day is over
+  correct?: boolean;
+  correct_answer?: number;
+  time_left?: number;
+}
+
+export interface ScoreResult {
+  id: string;
+  estimated_iq: number;
+  score: number;
+  correct_answers: number;
 }
 
 export interface LeaderboardEntry {
@@ -50,8 +73,29 @@ export const apiService = {
     return response.data;
   },
 
+  // Start a server-timed game session
+  createSession: async (
+    mode: string,
+    difficulty: string,
+    language: string = 'en',
+    count: number = 10
+  ): Promise<GameSession> => {
+    const response = await api.post('/sessions', { mode, difficulty, language, count });
+    return response.data;
+  },
+
+  // Record an answer in a game session
+  recordAnswer: async (
+    sessionToken: string,
+    index: number,
+    answer: number
+  ): Promise<SessionAnswerResult> => {
+    const response = await api.post(`/sessions/${sessionToken}/answers`, { index, answer });
+    return response.data;
+  },
+
   // Submit score
-  submitScore: async (scoreData: ScoreData) => {
+  submitScore: async (scoreData: ScoreData): Promise<ScoreResult> => {
     const response = await api.post('/scores', scoreData);
     return response.data;
   },
@@ -78,6 +122,12 @@ export const apiService = {
     return response.data;
   },
 
+  // Get live completion count for today's challenge
+  getDailyCompletions: async (): Promise<number> => {
+    const response = await api.get('/daily-challenge/completions');
+    return response.data.completions;
+  },
+
   // Complete daily challenge
   completeDailyChallenge: async () => {
     const response = await api.post('/daily-challenge/complete');
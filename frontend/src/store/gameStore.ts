@@ -12,7 +12,8 @@ export interface Question {
   difficulty: string;
   question: string;
   options: string[];
-  correct_answer: number;
+  // Only present on AI-generated questions; session questions are graded by the server
+  correct_answer?: number;
 }
 
 interface GameState {
@@ -27,6 +28,7 @@ interface GameState {
   questions: Question[];
   timeLeft: number;
   timeBonus: number;
+  sessionToken: string | null;
   isGameActive: boolean;
   showAd: boolean;
   adCounter: number;
@@ -42,6 +44,7 @@ interface GameState {
   addTimeBonus: (seconds: number) => void;
   decrementTime: () => void;
   setTimeLeft: (time: number) => void;
+  setSessionToken: (token: string | null) => void;
   resetGame: () => void;
   startGame: () => void;
   endGame: () => void;
@@ -63,6 +66,7 @@ export const useGameStore = create<GameState>()(
       questions: [],
       timeLeft: 60,
       timeBonus: 0,
+      sessionToken: null,
       isGameActive: false,
       showAd: false,
       adCounter: 0,
@@ -108,6 +112,7 @@ export const useGameStore = create<GameState>()(
       })),
       
       setTimeLeft: (time) => set({ timeLeft: time }),
+      setSessionToken: (token) => set({ sessionToken: token }),
       
       resetGame: () => set({
         currentScore: 0,
@@ -116,6 +121,7 @@ export const useGameStore = create<GameState>()(
         questions: [],
         timeLeft: 60,
         timeBonus: 0,
+        sessionToken: null,
         isGameActive: false,
         showAd: false,
         adCounter: 0,